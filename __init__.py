@@ -1,18 +1,50 @@
 from __future__ import annotations
 
+import asyncio
+from datetime import timedelta
+from functools import partial
+import logging
+import time
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .api import HemisClient
+from .api import HemisApiError, HemisClient, create_session
 from .const import (
     DOMAIN, PLATFORMS,
     CONF_BASE_URL, CONF_BUILDING_ID, CONF_TOKEN,
-    CONF_EMAIL, CONF_PASSWORD, AUTH_BASE_URL
+    CONF_EMAIL, CONF_PASSWORD, AUTH_BASE_URL,
+    CONF_MIN_SCAN_INTERVAL, CONF_MAX_SCAN_INTERVAL, CONF_SENSOR_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL, DEFAULT_SENSOR_SCAN_INTERVAL,
+    CONF_DEDICATED_SESSION, CONF_DISCOVERED_AT, CONF_BUILDINGS, CONF_METRICS,
+    CONF_SENSOR_AGGREGATE, CONF_SENSOR_WINDOW, CONF_TEMPERATURE_DEADBAND, CONF_BATTERY_DEADBAND,
+    CONF_GROUP_ENTITIES,
+    DEFAULT_SCAN_INTERVAL, DEFAULT_SENSOR_AGGREGATE, DEFAULT_SENSOR_WINDOW,
 )
-from .coordinator import HemisCoordinator
+from .coordinator import HemisCoordinator, snapshot_store
+from .metrics import HemisMetrics
+from .schedule import ScheduleEngine, schedule_store
+from .services import async_setup_services
+
+_LOGGER = logging.getLogger(__name__)
+
+# options qui changent la session, le client ou les entités créées : l'entrée est rechargée
+# (avec leur valeur par défaut : un premier enregistrement des options inchangées ne recharge pas)
+_RELOAD_OPTIONS = {
+    CONF_DEDICATED_SESSION: False,
+    CONF_METRICS: False,
+    CONF_SENSOR_AGGREGATE: DEFAULT_SENSOR_AGGREGATE,
+    CONF_SENSOR_WINDOW: DEFAULT_SENSOR_WINDOW,
+    CONF_TEMPERATURE_DEADBAND: 0.0,
+    CONF_BATTERY_DEADBAND: 0.0,
+    CONF_GROUP_ENTITIES: False,
+}
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    async_setup_services(hass)
+
     if DOMAIN not in config:
         return True
 
@@ -24,7 +56,11 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    session = async_get_clientsession(hass)
+    dedicated = entry.options.get(CONF_DEDICATED_SESSION, False)
+    if dedicated:
+        session, stats = create_session()
+    else:
+        session, stats = async_get_clientsession(hass), None
 
     client = HemisClient(
     base_url=entry.data[CONF_BASE_URL],
@@ -34,23 +70,167 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     password=entry.data[CONF_PASSWORD],
     auth_base_url=AUTH_BASE_URL,
     session=session,
+    owns_session=dedicated,
+    connection_stats=stats,
+    discovered_at=entry.data.get(CONF_DISCOVERED_AT, 0.0),
+    # les autres bâtiments ont chacun le leur (for_building)
+    metrics=HemisMetrics() if entry.options.get(CONF_METRICS, False) else None,
 )
 
-    coordinator = HemisCoordinator(hass, client)
-    await coordinator.async_config_entry_first_refresh()
+    # Un client par bâtiment, tous adossés au même token (un seul login pour le compte)
+    clients: dict[str, HemisClient] = {client.building_id: client}
+    # HA ne décharge pas les entrées à l'arrêt : session dédiée et tâches des clients fermées à la fermeture
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, partial(_async_close_on_stop, clients))
+    )
+
+    # toute erreur avant la fin de l'initialisation ferme les clients (et la session dédiée)
+    try:
+        for building in await _async_buildings(hass, entry, client):
+            bid = building[CONF_BUILDING_ID]
+            if bid not in clients:
+                clients[bid] = client.for_building(bid, building[CONF_BASE_URL])
+
+        for bid, c in clients.items():
+            c.on_discovery = _discovery_saver(hass, entry, bid)
+
+        coordinators: dict[str, HemisCoordinator] = {
+            bid: HemisCoordinator(
+                hass,
+                c,
+                *_poll_bounds(entry),
+                store=snapshot_store(hass, entry.entry_id, None if c is client else bid),
+            )
+            for bid, c in clients.items()
+        }
+
+        # premiers refresh de tous les bâtiments en parallèle
+        await asyncio.gather(*(_async_first_refresh(hass, entry, coord) for coord in coordinators.values()))
+
+        schedules = ScheduleEngine(hass, coordinators, schedule_store(hass, entry.entry_id))
+        await schedules.async_load()
+    except BaseException:
+        await _async_close_clients(clients)
+        raise
+    entry.async_on_unload(schedules.async_stop)
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "client": client,
-        "coordinator": coordinator,
+        "coordinator": coordinators[client.building_id],
+        "clients": clients,
+        "coordinators": coordinators,
+        "reload_options": _reload_options(entry),
+        "schedules": schedules,
     }
 
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+
+    if time.time() - client.discovered_at > client.discovery_ttl:
+        # découverte périmée : on vérifie les base_url en tâche de fond, sans bloquer le démarrage
+        # (une coroutine par bâtiment : les clients partagent une seule découverte du compte)
+        for c in clients.values():
+            entry.async_create_background_task(hass, c.async_resolve_base_url(), f"{DOMAIN} discovery")
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # bâtiments décalés sur l'intervalle de base : les polls ne tombent pas tous en même temps
+    step = DEFAULT_SCAN_INTERVAL.total_seconds() / len(coordinators)
+    for i, coord in enumerate(coordinators.values()):
+        if i:
+            entry.async_on_unload(coord.async_stagger(i * step))
     return True
 
 
+async def _async_buildings(hass: HomeAssistant, entry: ConfigEntry, client: HemisClient) -> list[dict[str, str]]:
+    """Bâtiments de l'entrée ; pour une entrée créée avant le multi-bâtiments, découverte une fois puis persistée."""
+    buildings = entry.data.get(CONF_BUILDINGS)
+    if buildings is not None:
+        return buildings
+
+    try:
+        discovered = await client.discover_buildings()
+    except HemisApiError as e:
+        _LOGGER.warning("Could not list the account buildings, using the configured one only: %s", e)
+        return [{CONF_BUILDING_ID: client.building_id, CONF_BASE_URL: client.base_url}]
+
+    buildings = [{CONF_BUILDING_ID: bid, CONF_BASE_URL: url} for bid, url in discovered]
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_BUILDINGS: buildings, CONF_DISCOVERED_AT: client.discovered_at}
+    )
+    return buildings
+
+
+def _discovery_saver(hass: HomeAssistant, entry: ConfigEntry, building_id: str):
+    @callback
+    def _async_save_discovery(base_url: str, discovered_at: float) -> None:
+        # base_url (re)découvert : persisté pour ne pas refaire la découverte à chaque redémarrage
+        data = {**entry.data, CONF_DISCOVERED_AT: discovered_at}
+        if building_id == data[CONF_BUILDING_ID]:
+            data[CONF_BASE_URL] = base_url
+        if CONF_BUILDINGS in data:
+            data[CONF_BUILDINGS] = [
+                {**b, CONF_BASE_URL: base_url} if b[CONF_BUILDING_ID] == building_id else b
+                for b in data[CONF_BUILDINGS]
+            ]
+        hass.config_entries.async_update_entry(entry, data=data)
+
+    return _async_save_discovery
+
+
+async def _async_first_refresh(hass: HomeAssistant, entry: ConfigEntry, coordinator: HemisCoordinator) -> None:
+    if await coordinator.async_load_snapshot():
+        # démarrage instantané depuis le cache : le refresh live part en tâche de fond
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN} first refresh")
+    else:
+        await coordinator.async_config_entry_first_refresh()
+
+
+async def _async_close_on_stop(clients: dict[str, HemisClient], _event: Event) -> None:
+    await _async_close_clients(clients)
+
+
+async def _async_close_clients(clients: dict[str, HemisClient]) -> None:
+    # bâtiments secondaires d'abord : le client principal possède la session
+    for c in reversed(list(clients.values())):
+        await c.async_close()
+
+
+def _poll_bounds(entry: ConfigEntry) -> tuple[timedelta, timedelta, timedelta]:
+    min_s = entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL.total_seconds())
+    max_s = entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL.total_seconds())
+    sensor_s = entry.options.get(CONF_SENSOR_SCAN_INTERVAL, DEFAULT_SENSOR_SCAN_INTERVAL.total_seconds())
+    return timedelta(seconds=min_s), timedelta(seconds=max_s), timedelta(seconds=sensor_s)
+
+
+def _reload_options(entry: ConfigEntry) -> dict:
+    return {key: entry.options.get(key, default) for key, default in _RELOAD_OPTIONS.items()}
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    data = hass.data[DOMAIN][entry.entry_id]
+    if data["reload_options"] != _reload_options(entry):
+        # session, métriques ou agrégation des capteurs : il faut recréer le client / les entités
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    # pas besoin de recharger l'entrée (re-login + refetch) : on ajuste juste les bornes
+    for coordinator in data["coordinators"].values():
+        coordinator.set_poll_bounds(*_poll_bounds(entry))
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unloaded:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if data:
+            await _async_close_clients(data["clients"])
     return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    await schedule_store(hass, entry.entry_id).async_remove()
+    for building in entry.data.get(CONF_BUILDINGS, []):
+        if building[CONF_BUILDING_ID] != entry.data[CONF_BUILDING_ID]:
+            await snapshot_store(hass, entry.entry_id, building[CONF_BUILDING_ID]).async_remove()
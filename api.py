@@ -1,15 +1,324 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import Any
+import base64
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field, replace
+import hashlib
+import json
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any
 import urllib.parse
 
 import aiohttp
 
+try:  # orjson est livré avec Home Assistant, mais on garde un repli stdlib
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if TYPE_CHECKING:
+    from .metrics import HemisMetrics
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _stdlib_loads(body: bytes) -> Any:
+    return json.loads(body)
+
+
+# décodeur JSON "pluggable" : remplaçable via set_json_decoder()
+_json_loads: Callable[[bytes], Any] = orjson.loads if orjson is not None else _stdlib_loads
+
+
+def set_json_decoder(loads: Callable[[bytes], Any] | None) -> None:
+    """Change le décodeur JSON utilisé par le client (None = meilleur disponible)."""
+    global _json_loads
+    if loads is None:
+        loads = orjson.loads if orjson is not None else _stdlib_loads
+    _json_loads = loads
+
+
+def decode_json(body: bytes) -> Any:
+    """Décode un corps de réponse brut ; corps vide -> None (comme aiohttp)."""
+    if not body or not body.strip():
+        return None
+    return _json_loads(body)
+
+
+# renouvellement du token en avance sur son expiration (au plus la moitié de sa durée de vie)
+TOKEN_REFRESH_MARGIN = 300  # secondes
+# délai minimal entre deux logins proactifs (token à durée de vie très courte)
+MIN_TOKEN_REFRESH_INTERVAL = 30  # secondes
+
+# Timeouts par endpoint (secondes) : les listes peuvent être lourdes, les commandes doivent répondre vite
+DEFAULT_TIMEOUTS: dict[str, float] = {
+    "auth": 15.0,
+    "sensors": 20.0,
+    "actuators": 20.0,
+    "command": 10.0,
+}
+
+# Retries (GET uniquement, idempotents) : backoff exponentiel avec jitter "full"
+GET_RETRIES = 2
+RETRY_BACKOFF = 0.5  # secondes, doublé à chaque essai
+
+
+# Découverte du bâtiment (/buildings/mine/infos) : résultat mis en cache, re-résolu si le base_url ne répond plus
+DISCOVERY_TTL = 7 * 24 * 3600  # secondes
+REDISCOVERY_MIN_INTERVAL = 300  # secondes, évite de marteler l'endpoint si le cloud est en panne
+
 
 class HemisApiError(Exception):
-    pass
+    def __init__(self, message: str = "", *, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status  # code HTTP si l'erreur vient d'une réponse
+
+
+class HemisTransientError(HemisApiError):
+    """Erreur temporaire (timeout, connexion, 5xx/429) : l'appel peut être retenté."""
+
+
+class HemisCircuitOpenError(HemisApiError):
+    """Le cloud Hemis est considéré comme indisponible : l'appel n'est pas tenté."""
+
+
+def _status_error(method: str, url: str, status: int, body: bytes) -> HemisApiError:
+    msg = f"{method} {url} -> {status}: {body[:300].decode(errors='replace')}"
+    if status >= 500 or status == 429:
+        return HemisTransientError(msg, status=status)
+    return HemisApiError(msg, status=status)
+
+
+@dataclass(slots=True)
+class CircuitBreaker:
+    """Coupe les appels après `failure_threshold` erreurs temporaires consécutives.
+
+    Une fois ouvert, un seul appel d'essai est laissé passer toutes les `reset_timeout`
+    secondes (half-open) : un succès le referme, un échec le rouvre. Un essai resté
+    sans verdict (erreur non temporaire, annulation) est abandonné après `reset_timeout`.
+    """
+
+    failure_threshold: int = 5
+    reset_timeout: float = 60.0
+    failures: int = 0
+    opened_at: float | None = None
+    # time.monotonic() du départ de l'appel d'essai en cours (half-open)
+    probe_started_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """True si l'appel peut partir ; en half-open, réserve l'unique appel d'essai."""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            return False
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+            # un essai est déjà en vol : les autres appels attendent son verdict
+            return False
+        self.probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probe_started_at = None
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def token_expiry(token: str) -> float | None:
+    """Expiration (epoch, secondes) d'un token JWT ; None si illisible ou sans `exp`."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return None
+
+
+def _to_float(v: Any) -> float | None:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _first_state_field(raw: dict[str, Any], field_name: str) -> float | None:
+    # On préfère hardwareState puis state/targetState
+    for k in ("hardwareState", "state", "targetState"):
+        v = (raw.get(k) or {}).get(field_name)
+        if v is not None:
+            return _to_float(v)
+    return None
+
+
+@dataclass(slots=True, frozen=True)
+class Actuator:
+    """Actionneur parsé une seule fois par poll depuis /intelligent-things/actuators."""
+
+    it_id: str
+    actuator_id: str
+    value: float | None
+    max_action_value: float | None
+    representation: str | None
+    factors: tuple[str, ...]
+
+    @classmethod
+    def from_json(cls, raw: dict[str, Any]) -> Actuator:
+        return cls(
+            it_id=raw.get("itId"),
+            actuator_id=raw.get("actuatorId"),
+            value=_first_state_field(raw, "value"),
+            max_action_value=_first_state_field(raw, "maxActionValue"),
+            representation=raw.get("actionningRepresentation"),
+            factors=tuple(raw.get("factors") or ()),
+        )
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.it_id, self.actuator_id)
+
+    # format compact (liste positionnelle) pour le snapshot persistant
+    def to_row(self) -> list[Any]:
+        return [self.it_id, self.actuator_id, self.value, self.max_action_value, self.representation, list(self.factors)]
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> Actuator:
+        it_id, actuator_id, value, max_action_value, representation, factors = row
+        return cls(it_id, actuator_id, value, max_action_value, representation, tuple(factors))
+
+
+@dataclass(slots=True, frozen=True)
+class Sensor:
+    """Capteur parsé depuis /intelligent-things/sensors."""
+
+    id: str
+    state_id: str | None
+    value: float | None
+    raw_value: Any
+
+    @classmethod
+    def from_json(cls, raw: dict[str, Any]) -> Sensor:
+        state = raw.get("state") or {}
+        v = state.get("value")
+        return cls(
+            id=raw.get("id"),
+            state_id=state.get("id"),
+            value=_to_float(v),
+            raw_value=v,
+        )
+
+    @property
+    def key(self) -> str:
+        return self.id
+
+    def to_row(self) -> list[Any]:
+        return [self.id, self.state_id, self.value, self.raw_value]
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> Sensor:
+        sensor_id, state_id, value, raw_value = row
+        return cls(sensor_id, state_id, value, raw_value)
+
+
+# Session dédiée (optionnelle) : pool de connexions keep-alive réservé aux endpoints Hemis
+SESSION_LIMIT_PER_HOST = 4
+SESSION_KEEPALIVE_TIMEOUT = 60.0  # secondes
+SESSION_DNS_TTL = 300  # secondes
+
+
+@dataclass(slots=True)
+class ConnectionStats:
+    """Compteurs de réutilisation des connexions (alimentés par un aiohttp.TraceConfig)."""
+
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+
+    @property
+    def reuse_ratio(self) -> float | None:
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": self.reuse_ratio,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
+
+
+def create_session(
+    *,
+    limit_per_host: int = SESSION_LIMIT_PER_HOST,
+    keepalive_timeout: float = SESSION_KEEPALIVE_TIMEOUT,
+    ttl_dns_cache: int = SESSION_DNS_TTL,
+) -> tuple[aiohttp.ClientSession, ConnectionStats]:
+    """Crée une session avec son propre connecteur (à fermer par l'appelant) et ses stats."""
+    stats = ConnectionStats()
+    trace = aiohttp.TraceConfig()
+
+    def _count(attr: str):
+        async def _on_event(session, ctx, params) -> None:
+            setattr(stats, attr, getattr(stats, attr) + 1)
+        return _on_event
+
+    trace.on_request_start.append(_count("requests"))
+    trace.on_connection_create_end.append(_count("connections_created"))
+    trace.on_connection_reuseconn.append(_count("connections_reused"))
+    trace.on_dns_cache_hit.append(_count("dns_cache_hits"))
+    trace.on_dns_cache_miss.append(_count("dns_cache_misses"))
+
+    connector = aiohttp.TCPConnector(
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+    return aiohttp.ClientSession(connector=connector, trace_configs=[trace]), stats
+
+
+@dataclass(slots=True)
+class _CachedResponse:
+    """Dernière réponse d'un GET : validateurs HTTP + empreinte du corps + objet décodé."""
+
+    etag: str | None
+    last_modified: str | None
+    digest: bytes
+    data: Any
+
+
+@dataclass(slots=True)
+class _PendingCommand:
+    value: float
+    duration_ms: int
+    waiters: list[asyncio.Future] = field(default_factory=list)
+
+
+def _fail_waiters(commands: Iterable[_PendingCommand], error: Exception) -> None:
+    for cmd in commands:
+        for w in cmd.waiters:
+            if not w.done():
+                w.set_exception(error)
 
 
 @dataclass
@@ -25,9 +334,98 @@ class HemisClient:
     auth_base_url: str         # https://hemisphere.ubiant.com
 
     session: aiohttp.ClientSession
+    # True si la session a été créée pour ce client (create_session) : fermée par async_close()
+    owns_session: bool = False
+    connection_stats: ConnectionStats | None = None
+
+    # découverte : epoch du dernier /buildings/mine/infos (persisté dans l'entrée) + callback de mise à jour
+    discovered_at: float = 0.0
+    discovery_ttl: float = DISCOVERY_TTL
+    on_discovery: Callable[[str, float], None] | None = None
+    _buildings: list[dict[str, Any]] | None = field(default=None, init=False, repr=False)
+    _discovery_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+
+    # lock (par client) pour éviter que 10 calls 401 re-auth en même temps
+    _auth_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+    _token_expires_at: float | None = field(default=None, init=False, repr=False)
+    # durée de vie du token obtenu au dernier login (None : token de la config, émis à une date inconnue)
+    _token_lifetime: float | None = field(default=None, init=False, repr=False)
+    _last_login_at: float = field(default=0.0, init=False, repr=False)
+    _token_refresh_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    # client "propriétaire" du token pour les autres bâtiments du compte (cf. for_building)
+    _auth_owner: HemisClient | None = field(default=None, init=False, repr=False)
+
+    # Résilience : timeouts par endpoint, retries des GET, disjoncteur partagé par le client
+    timeouts: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_TIMEOUTS))
+    get_retries: int = GET_RETRIES
+    retry_backoff: float = RETRY_BACKOFF
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+
+    # File de commandes : les écritures reçues pendant command_window sont regroupées,
+    # dédoublonnées par actionneur (dernière valeur gagnante) puis envoyées en parallèle.
+    command_window: float = 0.15
+    command_concurrency: int = 4
+    # partagé par tous les envois du client (lots, commandes groupées, plannings) : vraie limite par client
+    _command_sem: asyncio.Semaphore = field(init=False, repr=False)
+    # appelé une seule fois à la fin de chaque lot (ex: refresh du coordinator)
+    on_commands_sent: Callable[[], Awaitable[None]] | None = None
+
+    # métriques des chemins chauds (option) ; None = désactivées, aucune mesure prise
+    metrics: HemisMetrics | None = None
+
+    # cache des GET (requêtes conditionnelles / corps identique) et des modèles parsés associés
+    _http_cache: dict[str, _CachedResponse] = field(default_factory=dict, init=False, repr=False)
+    _models_cache: dict[str, tuple[Any, list]] = field(default_factory=dict, init=False, repr=False)
+    # GET en vol, par path (single-flight)
+    _inflight_gets: dict[str, asyncio.Task] = field(default_factory=dict, init=False, repr=False)
+
+    _pending_commands: dict[tuple[str, str], _PendingCommand] = field(default_factory=dict, init=False, repr=False)
+    _flush_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    # lots en cours d'envoi (le lot n'est plus dans _pending_commands) : annulés par async_close
+    _flush_tasks: set[asyncio.Task] = field(default_factory=set, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._token_expires_at = token_expiry(self.token)
+        self._command_sem = asyncio.Semaphore(max(1, self.command_concurrency))
+
+    async def async_close(self) -> None:
+        """Arrête les tâches de fond (refresh du token, lots de commandes en attente ou en cours)."""
+        for task in (self._token_refresh_task, *self._flush_tasks):
+            if task is not None and not task.done():
+                task.cancel()
+        self._token_refresh_task = None
+        self._flush_task = None
+        # lot pas encore parti : ses appelants ne doivent pas attendre indéfiniment
+        pending, self._pending_commands = self._pending_commands, {}
+        _fail_waiters(pending.values(), HemisApiError("Hemis client closed, command not sent"))
+        if self.owns_session and not self.session.closed:
+            await self.session.close()
+
+    def for_building(self, building_id: str, base_url: str) -> HemisClient:
+        """Client d'un autre bâtiment du compte : même session et même token (un seul login)."""
+        child = replace(
+            self,
+            building_id=building_id,
+            base_url=base_url,
+            owns_session=False,
+            on_commands_sent=None,
+            on_discovery=None,
+            breaker=CircuitBreaker(self.breaker.failure_threshold, self.breaker.reset_timeout),
+            # métriques propres au bâtiment (latences, tailles, entités notifiées ne se mélangent pas) ;
+            # les re-login, faits par le client propriétaire, sont comptés sur le bâtiment principal
+            metrics=type(self.metrics)() if self.metrics is not None else None,
+        )
+        child._auth_owner = self._auth_owner or self
+        return child
+
+    def _timeout(self, endpoint: str) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.timeouts.get(endpoint, 20.0))
 
-    # lock pour éviter que 10 calls 401 re-auth en même temps
-    _auth_lock: asyncio.Lock = asyncio.Lock()
+    def _check_breaker(self, url: str) -> None:
+        if not self.breaker.allow():
+            if self.metrics is not None:
+                self.metrics.inc("circuit_open")
+            raise HemisCircuitOpenError(f"Hemis API unavailable, not calling {url} (circuit open)")
 
     def _headers(self) -> dict[str, str]:
         return {
@@ -36,92 +434,358 @@ class HemisClient:
             "Accept": "application/json",
         }
 
-    async def _request_json(self, method: str, url: str, *, headers=None, json_body=None) -> Any:
+    async def _request_json(self, method: str, url: str, *, headers=None, json_body=None, endpoint: str = "auth") -> Any:
         try:
             async with self.session.request(
                 method,
                 url,
                 headers=headers,
                 json=json_body,
-                timeout=aiohttp.ClientTimeout(total=20),
+                timeout=self._timeout(endpoint),
             ) as resp:
-                text = await resp.text()
+                # une seule lecture du corps ; le texte n'est matérialisé que pour les erreurs
+                body = await resp.read()
                 if resp.status >= 400:
-                    raise HemisApiError(f"{method} {url} -> {resp.status}: {text[:300]}")
-                return await resp.json(content_type=None)
+                    raise _status_error(method, url, resp.status, body)
+                return decode_json(body)
         except asyncio.TimeoutError as e:
-            raise HemisApiError(f"Timeout calling {url}") from e
+            raise HemisTransientError(f"Timeout calling {url}") from e
         except aiohttp.ClientError as e:
-            raise HemisApiError(f"HTTP error calling {url}: {e}") from e
+            raise HemisTransientError(f"HTTP error calling {url}: {e}") from e
+        except ValueError as e:
+            raise HemisApiError(f"Invalid JSON from {url}: {e}") from e
+
+    async def _authenticate(self, stale_token: str | None = None) -> None:
+        """Re-login sur hemisphere.ubiant.com et met à jour self.token.
+
+        `stale_token` = token refusé par l'appelant : si un autre appel l'a déjà
+        remplacé pendant qu'on attendait le lock, on ne refait pas de login.
+        """
+        if self._auth_owner is not None:
+            await self._auth_owner._authenticate(stale_token)
+            self.token = self._auth_owner.token
+            return
 
-    async def _authenticate(self) -> None:
-        """Re-login sur hemisphere.ubiant.com et met à jour self.token."""
         async with self._auth_lock:
-            # Si un autre call a déjà refresh, on évite un second login.
-            # (Optionnel: tu peux mémoriser un timestamp)
+            if stale_token is not None and self.token != stale_token:
+                return
+
             signin_url = f"{self.auth_base_url.rstrip('/')}/users/signin"
             payload = {"email": self.email, "password": self.password}
 
+            metrics = self.metrics
+            start = time.perf_counter() if metrics is not None else 0.0
             data = await self._request_json(
                 "POST",
                 signin_url,
                 headers={"Content-Type": "application/json", "Accept": "application/json"},
                 json_body=payload,
             )
+            if metrics is not None:
+                metrics.observe_latency("auth", time.perf_counter() - start)
+                metrics.inc("reauth")
 
-            token = data.get("token")
+            token = data.get("token") if isinstance(data, dict) else None
             if not token:
                 raise HemisApiError("Signin succeeded but no token found in response")
             self.token = token
-
-    async def discover_building_and_base_url(self) -> tuple[str, str]:
-        """Retourne (building_id, hemis_base_url) depuis /buildings/mine/infos."""
-        infos_url = f"{self.auth_base_url.rstrip('/')}/buildings/mine/infos"
-        data = await self._request_json(
-            "GET",
-            infos_url,
-            headers={"Authorization": f"Bearer {self.token}", "Accept": "application/json"},
-        )
-
-        # Réponse = liste
-        if not isinstance(data, list) or not data:
-            raise HemisApiError("buildings/mine/infos returned an empty list")
-
-        first = data[0]
-        building_id = first.get("buildingId")
-        base_url = first.get("hemis_base_url")
+            self._last_login_at = time.time()
+            self._token_expires_at = token_expiry(token)
+            self._token_lifetime = (
+                self._token_expires_at - self._last_login_at if self._token_expires_at is not None else None
+            )
+            self._schedule_token_refresh()
+
+    def _token_refresh_at(self) -> float | None:
+        """Epoch du renouvellement proactif ; None si l'expiration du token est inconnue."""
+        exp = self._token_expires_at
+        if exp is None:
+            return None
+        margin = TOKEN_REFRESH_MARGIN
+        if self._token_lifetime is not None:
+            # token court : sans ce plafond, le renouvellement serait dû dès le login (boucle de logins)
+            margin = min(margin, max(0.0, self._token_lifetime) / 2)
+        # plancher anti-boucle, mais jamais après l'expiration (sinon retour au chemin 401 -> login)
+        return min(max(exp - margin, self._last_login_at + MIN_TOKEN_REFRESH_INTERVAL), exp)
+
+    def _token_needs_refresh(self) -> bool:
+        refresh_at = self._token_refresh_at()
+        return refresh_at is not None and time.time() >= refresh_at
+
+    async def _ensure_token(self) -> None:
+        """Renouvelle le token avant l'appel s'il est (presque) expiré, plutôt que d'attendre un 401."""
+        if self._auth_owner is not None:
+            await self._auth_owner._ensure_token()
+            self.token = self._auth_owner.token
+            return
+        if self._token_refresh_task is None:
+            self._schedule_token_refresh()
+        if self._token_needs_refresh():
+            await self._authenticate(stale_token=self.token)
+
+    def _schedule_token_refresh(self) -> None:
+        if self._token_refresh_task is not None and not self._token_refresh_task.done():
+            if self._token_refresh_task is asyncio.current_task():
+                # appelé depuis la tâche elle-même : elle se termine juste après
+                self._token_refresh_task = None
+            else:
+                self._token_refresh_task.cancel()
+        refresh_at = self._token_refresh_at()
+        if refresh_at is None:
+            return
+        delay = max(0.0, refresh_at - time.time())
+        self._token_refresh_task = asyncio.get_running_loop().create_task(self._refresh_token_later(delay))
+
+    async def _refresh_token_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self._authenticate(stale_token=self.token)
+        except HemisApiError as e:
+            # pas bloquant : le prochain appel retentera (ou passera par le 401)
+            _LOGGER.warning("Proactive token refresh failed: %s", e)
+
+    async def _fetch_buildings(self, *, max_age: float) -> list[dict[str, Any]]:
+        """/buildings/mine/infos, mis en cache `max_age` secondes ; un seul appel en vol à la fois."""
+        if self._auth_owner is not None:
+            # même compte : la découverte est partagée avec le client propriétaire
+            buildings = await self._auth_owner._fetch_buildings(max_age=max_age)
+            self.discovered_at = self._auth_owner.discovered_at
+            return buildings
+
+        async with self._discovery_lock:
+            if self._buildings is not None and time.time() - self.discovered_at < max_age:
+                return self._buildings
+
+            await self._ensure_token()
+            infos_url = f"{self.auth_base_url.rstrip('/')}/buildings/mine/infos"
+            used_token = self.token
+            try:
+                data = await self._request_json(
+                    "GET",
+                    infos_url,
+                    headers={"Authorization": f"Bearer {used_token}", "Accept": "application/json"},
+                )
+            except HemisApiError as e:
+                if e.status != 401:
+                    raise
+                await self._authenticate(stale_token=used_token)
+                data = await self._request_json(
+                    "GET",
+                    infos_url,
+                    headers={"Authorization": f"Bearer {self.token}", "Accept": "application/json"},
+                )
+
+            # Réponse = liste
+            if not isinstance(data, list) or not data:
+                raise HemisApiError("buildings/mine/infos returned an empty list")
+
+            self._buildings = data
+            self.discovered_at = time.time()
+            return data
+
+    def _pick_building(self, buildings: list[dict[str, Any]]) -> tuple[str, str]:
+        # premier bâtiment seulement à la découverte initiale (config flow, building_id vide) :
+        # un client déjà rattaché ne doit jamais être pointé sur le base_url d'un autre bâtiment
+        if not self.building_id:
+            chosen = buildings[0]
+        else:
+            chosen = next((b for b in buildings if b.get("buildingId") == self.building_id), None)
+            if chosen is None:
+                raise HemisApiError(f"Building {self.building_id} not found in buildings/mine/infos response")
+        building_id = chosen.get("buildingId")
+        base_url = chosen.get("hemis_base_url")
 
         if not building_id or not base_url:
             raise HemisApiError("Missing buildingId or hemis_base_url in buildings/mine/infos response")
 
         return building_id, base_url
 
-    async def _get_json(self, path: str) -> Any:
+    async def discover_buildings(self) -> list[tuple[str, str]]:
+        """Tous les bâtiments du compte : [(building_id, hemis_base_url), ...]."""
+        buildings = [
+            (b["buildingId"], b["hemis_base_url"])
+            for b in await self._fetch_buildings(max_age=self.discovery_ttl)
+            if b.get("buildingId") and b.get("hemis_base_url")
+        ]
+        if not buildings:
+            raise HemisApiError("Missing buildingId or hemis_base_url in buildings/mine/infos response")
+        return buildings
+
+    async def discover_building_and_base_url(self) -> tuple[str, str]:
+        """Retourne (building_id, hemis_base_url) depuis /buildings/mine/infos (cache `discovery_ttl`)."""
+        return self._pick_building(await self._fetch_buildings(max_age=self.discovery_ttl))
+
+    async def async_resolve_base_url(self, failed_base_url: str | None = None) -> bool:
+        """Re-découvre le base_url du bâtiment ; True s'il diffère de `failed_base_url`.
+
+        Appelé quand le base_url ne répond plus (erreur de connexion, 404). Les appels
+        concurrents partagent la même découverte.
+        """
+        failed = failed_base_url or self.base_url
+        if self.base_url == failed and time.time() - self.discovered_at >= REDISCOVERY_MIN_INTERVAL:
+            try:
+                _, base_url = self._pick_building(await self._fetch_buildings(max_age=REDISCOVERY_MIN_INTERVAL))
+            except HemisApiError as e:
+                _LOGGER.warning("Hemis base URL re-discovery failed: %s", e)
+                return False
+
+            if base_url != self.base_url:
+                _LOGGER.info("Hemis base URL changed: %s -> %s", self.base_url, base_url)
+                self.base_url = base_url
+                # autre serveur : caches HTTP et disjoncteur repartent de zéro
+                self._http_cache.clear()
+                self._models_cache.clear()
+                self.breaker.record_success()
+            if self.on_discovery is not None:
+                self.on_discovery(self.base_url, self.discovered_at)
+        return self.base_url != failed
+
+    async def _get_json(self, path: str, *, endpoint: str = "default") -> Any:
+        """GET single-flight : les appels simultanés sur un même path partagent une seule requête."""
+        task = self._inflight_gets.get(path)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._get_json_with_retries(path, endpoint=endpoint))
+            self._inflight_gets[path] = task
+            task.add_done_callback(lambda t, p=path: self._on_get_done(p, t))
+        # shield : un appelant annulé n'annule pas la requête des autres
+        return await asyncio.shield(task)
+
+    def _on_get_done(self, path: str, task: asyncio.Task) -> None:
+        if self._inflight_gets.get(path) is task:
+            del self._inflight_gets[path]
+        if not task.cancelled():
+            task.exception()  # évite "exception was never retrieved" si tous les appelants ont abandonné
+
+    async def _get_json_with_retries(self, path: str, *, endpoint: str, _rediscovered: bool = False) -> Any:
+        """GET avec retries (backoff exponentiel + jitter) sur les erreurs temporaires, derrière le disjoncteur.
+
+        Si le base_url ne répond plus (connexion impossible ou 404), on re-découvre
+        l'URL du bâtiment et on retente une fois sur la nouvelle.
+        """
+        base_url = self.base_url
+        url = f"{base_url.rstrip('/')}/{path.lstrip('/')}"
+        attempt = 0
+        while True:
+            self._check_breaker(url)
+            try:
+                data = await self._get_json_once(path, endpoint=endpoint)
+            except HemisTransientError as e:
+                self.breaker.record_failure()
+                if attempt >= self.get_retries or not self.breaker.allow():
+                    if e.status is None and not _rediscovered and await self.async_resolve_base_url(base_url):
+                        return await self._get_json_with_retries(path, endpoint=endpoint, _rediscovered=True)
+                    raise
+                delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+                if self.metrics is not None:
+                    self.metrics.inc("retries")
+                _LOGGER.debug("GET %s failed (%s), retry %d in %.2fs", url, e, attempt + 1, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except HemisApiError as e:
+                # réponse non temporaire (4xx, 401 après re-login, JSON invalide) : le serveur répond,
+                # le disjoncteur (et un éventuel appel d'essai half-open) n'a pas à rester bloqué
+                self.breaker.record_success()
+                if e.status == 404 and not _rediscovered and await self.async_resolve_base_url(base_url):
+                    return await self._get_json_with_retries(path, endpoint=endpoint, _rediscovered=True)
+                raise
+            self.breaker.record_success()
+            return data
+
+    async def _get_json_once(self, path: str, *, endpoint: str, _retried: bool = False) -> Any:
+        """GET JSON ; renvoie l'objet déjà décodé (même instance) si la ressource n'a pas changé."""
         url = f"{self.base_url.rstrip('/')}/{path.lstrip('/')}"
+        cached = self._http_cache.get(path)
+
+        await self._ensure_token()
+        used_token = self.token
+        headers = self._headers()
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        metrics = self.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
         try:
-            async with self.session.get(url, headers=self._headers(), timeout=aiohttp.ClientTimeout(total=20)) as resp:
-                text = await resp.text()
-
+            async with self.session.get(url, headers=headers, timeout=self._timeout(endpoint)) as resp:
                 if resp.status == 401:
-                    await self._authenticate()
-                    return await self._get_json(path)
-
+                    if metrics is not None:
+                        metrics.inc("unauthorized")
+                    if _retried:
+                        raise HemisApiError(f"GET {url} -> 401 after re-authentication")
+                    await self._authenticate(stale_token=used_token)
+                    return await self._get_json_once(path, endpoint=endpoint, _retried=True)
+
+                if resp.status == 304 and cached is not None:
+                    if metrics is not None:
+                        metrics.observe_latency(endpoint, time.perf_counter() - start)
+                        metrics.inc("not_modified")
+                    return cached.data
+
+                body = await resp.read()
+                if metrics is not None:
+                    # temps réseau seul (en-têtes + corps), hors décodage
+                    metrics.observe_latency(endpoint, time.perf_counter() - start)
+                    metrics.payload_bytes[endpoint] = len(body)
                 if resp.status >= 400:
-                    raise HemisApiError(f"GET {url} -> {resp.status}: {text[:300]}")
-                return await resp.json(content_type=None)
+                    raise _status_error("GET", url, resp.status, body)
+
+                # Pas de validateurs côté serveur ? On compare l'empreinte du corps pour éviter de re-décoder.
+                digest = hashlib.blake2b(body, digest_size=16).digest()
+                if cached is not None and cached.digest == digest:
+                    data = cached.data
+                    if metrics is not None:
+                        metrics.inc("unchanged_body")
+                else:
+                    data = decode_json(body)
+
+                self._http_cache[path] = _CachedResponse(
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                    digest=digest,
+                    data=data,
+                )
+                return data
         except asyncio.TimeoutError as e:
-            raise HemisApiError(f"Timeout calling {url}") from e
+            if metrics is not None:
+                metrics.inc("timeouts")
+            raise HemisTransientError(f"Timeout calling {url}") from e
         except aiohttp.ClientError as e:
-            raise HemisApiError(f"HTTP error calling {url}: {e}") from e
-
-    async def get_sensors(self) -> list[dict[str, Any]]:
-        return await self._get_json("/intelligent-things/sensors")
-
-    async def get_actuators(self) -> list[dict[str, Any]]:
-        return await self._get_json("/intelligent-things/actuators")
-
-
-    async def set_actuator_value(self, it_id: str, actuator_id: str, value: float, duration_ms: int = 30000) -> None:
+            raise HemisTransientError(f"HTTP error calling {url}: {e}") from e
+        except ValueError as e:
+            raise HemisApiError(f"Invalid JSON from {url}: {e}") from e
+
+    def _parse_models(
+        self, path: str, data: Any, parser: Callable[[dict[str, Any]], Any], *, endpoint: str
+    ) -> list:
+        # même objet JSON que le poll précédent -> mêmes modèles (le coordinator saute alors le diff)
+        cached = self._models_cache.get(path)
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        metrics = self.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
+        models = [parser(x) for x in data or []]
+        if metrics is not None:
+            metrics.observe(f"parse_{endpoint}", time.perf_counter() - start)
+        self._models_cache[path] = (data, models)
+        return models
+
+    async def get_sensors(self) -> list[Sensor]:
+        path = "/intelligent-things/sensors"
+        data = await self._get_json(path, endpoint="sensors")
+        return self._parse_models(path, data, Sensor.from_json, endpoint="sensors")
+
+    async def get_actuators(self) -> list[Actuator]:
+        path = "/intelligent-things/actuators"
+        data = await self._get_json(path, endpoint="actuators")
+        return self._parse_models(path, data, Actuator.from_json, endpoint="actuators")
+
+
+    async def set_actuator_value(
+        self, it_id: str, actuator_id: str, value: float, duration_ms: int = 30000, *, _retried: bool = False
+    ) -> None:
         it_enc = urllib.parse.quote(it_id, safe="")
         actuator_enc = urllib.parse.quote(actuator_id, safe="")  # <-- IMPORTANT
 
@@ -130,23 +794,117 @@ class HemisClient:
 
         payload = {"value": float(value), "duration": int(duration_ms)}
 
+        self._check_breaker(url)
+        await self._ensure_token()
+        used_token = self.token
+
+        # pas de retry automatique sur une commande : on ne sait pas si le device l'a déjà reçue
+        unauthorized = False
+        metrics = self.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
         try:
             async with self.session.put(
                 url,
                 headers={**self._headers(), "Content-Type": "application/json"},
                 json=payload,
-                timeout=aiohttp.ClientTimeout(total=20),
+                timeout=self._timeout("command"),
             ) as resp:
-                text = await resp.text()
-
                 if resp.status == 401:
-                    await self._authenticate()
-                    return await self.set_actuator_value(it_id, actuator_id, value, duration_ms)
-
-                if resp.status >= 400:
-                    raise HemisApiError(f"PUT {url} -> {resp.status}: {text[:300]}")
+                    unauthorized = True
+                elif resp.status >= 400:
+                    raise _status_error("PUT", url, resp.status, await resp.read())
+        except HemisTransientError:
+            self.breaker.record_failure()
+            raise
+        except HemisApiError:
+            # 4xx : le serveur répond
+            self.breaker.record_success()
+            raise
         except asyncio.TimeoutError as e:
-            raise HemisApiError(f"Timeout calling {url}") from e
+            self.breaker.record_failure()
+            if metrics is not None:
+                metrics.inc("timeouts")
+            raise HemisTransientError(f"Timeout calling {url}") from e
         except aiohttp.ClientError as e:
-            raise HemisApiError(f"HTTP error calling {url}: {e}") from e
-
+            self.breaker.record_failure()
+            raise HemisTransientError(f"HTTP error calling {url}: {e}") from e
+        self.breaker.record_success()
+        if metrics is not None:
+            metrics.observe_latency("command", time.perf_counter() - start)
+
+        if unauthorized:
+            if metrics is not None:
+                metrics.inc("unauthorized")
+            if _retried:
+                raise HemisApiError(f"PUT {url} -> 401 after re-authentication")
+            await self._authenticate(stale_token=used_token)
+            await self.set_actuator_value(it_id, actuator_id, value, duration_ms, _retried=True)
+
+    async def queue_actuator_value(self, it_id: str, actuator_id: str, value: float, duration_ms: int = 30000) -> None:
+        """Met une écriture en file ; rend la main quand le lot qui la contient est envoyé."""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        key = (it_id, actuator_id)
+        cmd = self._pending_commands.get(key)
+        if cmd is None:
+            self._pending_commands[key] = _PendingCommand(value, duration_ms, [waiter])
+        else:
+            # même actionneur dans la fenêtre : la dernière valeur gagne
+            cmd.value = value
+            cmd.duration_ms = duration_ms
+            cmd.waiters.append(waiter)
+
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_commands())
+            self._flush_tasks.add(self._flush_task)
+            self._flush_task.add_done_callback(self._flush_tasks.discard)
+
+        await waiter
+
+    async def set_actuator_values(
+        self, commands: dict[tuple[str, str], tuple[float, int]]
+    ) -> dict[tuple[str, str], Exception | None]:
+        """Envoie plusieurs commandes en parallèle, au plus `command_concurrency` à la fois pour le client.
+
+        `commands` : (it_id, actuator_id) -> (valeur, duration_ms). Retourne le résultat
+        par actionneur (None = succès) : un échec n'interrompt pas les autres envois.
+        """
+        async def _send(key: tuple[str, str], value: float, duration_ms: int) -> Exception | None:
+            async with self._command_sem:
+                try:
+                    await self.set_actuator_value(key[0], key[1], value, duration_ms)
+                except Exception as e:  # noqa: BLE001 - remonté à l'appelant, par actionneur
+                    return e
+            return None
+
+        keys = list(commands)
+        results = await asyncio.gather(*(_send(k, *commands[k]) for k in keys))
+        return dict(zip(keys, results))
+
+    async def _flush_commands(self) -> None:
+        batch: dict[tuple[str, str], _PendingCommand] = {}
+        try:
+            await asyncio.sleep(self.command_window)
+            batch, self._pending_commands = self._pending_commands, {}
+            self._flush_task = None
+
+            results = await self.set_actuator_values({k: (c.value, c.duration_ms) for k, c in batch.items()})
+            for key, cmd in batch.items():
+                error = results[key]
+                for w in cmd.waiters:
+                    if w.done():
+                        continue
+                    if error is not None:
+                        w.set_exception(error)
+                    else:
+                        w.set_result(None)
+        finally:
+            # lot annulé (fermeture du client) ou erreur inattendue : aucun appelant ne reste bloqué
+            _fail_waiters(batch.values(), HemisApiError("Command batch aborted"))
+
+        if self.on_commands_sent is not None:
+            try:
+                await self.on_commands_sent()
+            except Exception:  # noqa: BLE001
+                _LOGGER.exception("Error in on_commands_sent callback")
@@ -0,0 +1,220 @@
+"""Benchmark de bout en bout de HemisClient contre le serveur Hemis local (mock_server.py).
+
+Mesure :
+- un refresh d'un vrai HemisCoordinator (GET parallèles, snapshot, diff, dispatch ciblé
+  vers un listener par device) : latence, coût snapshot/diff et dispatch, entités notifiées ;
+- le débit des commandes : PUT un par un vs file de commandes (queue_actuator_value).
+
+Le coordinator nécessite homeassistant ; sans lui, seule la latence des GET du client
+est mesurée. Les garde-fous automatiques (nombre de requêtes, 304, login unique,
+un refresh par lot, plafond de temps) sont dans tests/ (pytest).
+
+Usage :
+    python benchmarks/bench_client.py --actuators 2000 --latency-ms 50 --churn 0.02
+    python benchmarks/bench_client.py --error-rate 0.05 --unauthorized-rate 0.01 --etag
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import importlib.util
+from pathlib import Path
+import statistics
+import sys
+import time
+
+import aiohttp
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_server import MockHemis  # noqa: E402
+
+
+def load_modules():
+    """(api, coordinator|None) : charge l'intégration comme un package pour les imports relatifs."""
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "ubiant_hemis", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+        )
+        pkg = importlib.util.module_from_spec(spec)
+        sys.modules["ubiant_hemis"] = pkg
+        spec.loader.exec_module(pkg)
+        return importlib.import_module("ubiant_hemis.api"), importlib.import_module("ubiant_hemis.coordinator")
+    except ImportError:
+        sys.modules.pop("ubiant_hemis", None)
+        sys.path.insert(0, str(ROOT))
+        return importlib.import_module("api"), None
+
+
+def _percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "n/a"
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms   max {ordered[-1] * 1000:8.2f} ms"
+
+
+async def bench_refresh(api, coordinator, client, iterations: int) -> None:
+    if coordinator is None:
+        await _bench_client_refresh(api, client, iterations)
+        return
+
+    from homeassistant.core import HomeAssistant
+
+    from ubiant_hemis.metrics import HemisMetrics
+
+    # vrai HemisCoordinator : intervalle adaptatif, réconciliation optimiste, classification,
+    # diff et dispatch ciblé ; une "entité" (listener avec contexte) par device comme en prod
+    hass = HomeAssistant(str(ROOT / "benchmarks"))
+    metrics = client.metrics = HemisMetrics()
+    coord = coordinator.HemisCoordinator(hass, client)
+    await coord.async_refresh()
+    for act in coord.data.actuators:
+        coord.async_add_listener(lambda: None, coordinator.actuator_context(*act.key))
+    for sensor in coord.data.sensors:
+        coord.async_add_listener(lambda: None, coordinator.sensor_context(sensor.id))
+    metrics.timings.clear()
+
+    latencies: list[float] = []
+    notified: list[int] = []
+    errors = 0
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await coord.async_refresh()
+            if not coord.last_update_success:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            notified.append(metrics.entities_updated_last)
+    finally:
+        await hass.async_stop(force=True)
+
+    timings = {name: hist.as_dict() for name, hist in metrics.timings.items()}
+    print(f"refresh coordinator           {_percentiles(latencies)}   erreurs {errors}/{iterations}")
+    for name in ("snapshot_diff", "dispatch"):
+        t = timings.get(name)
+        if t:
+            print(f"  {name:<27} avg {t['avg_ms']:8.2f} ms   max {t['max_ms']:8.2f} ms")
+    avg = statistics.mean(notified) if notified else 0
+    print(f"  entités notifiées/tick      {avg:.1f}   intervalle final {coord.update_interval}")
+
+
+async def _bench_client_refresh(api, client, iterations: int) -> None:
+    """Sans homeassistant : seulement la latence des GET parallèles du client."""
+    latencies: list[float] = []
+    errors = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(client.get_sensors(), client.get_actuators())
+        except api.HemisApiError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    print(f"refresh (sensors+actuators)   {_percentiles(latencies)}   erreurs {errors}/{iterations}")
+    print("coordinator                   sauté (homeassistant non installé)")
+
+
+async def bench_commands(api, client, mock: MockHemis, count: int) -> None:
+    keys = list(mock._actuators)[:count]
+
+    start = time.perf_counter()
+    failed = 0
+    for it_id, actuator_id in keys:
+        try:
+            await client.set_actuator_value(it_id, actuator_id, 1.0, duration_ms=0)
+        except api.HemisApiError:
+            failed += 1
+    sequential = time.perf_counter() - start
+    print(f"commandes séquentielles       {count / sequential:8.1f} cmd/s   ({failed} échecs)")
+
+    sent = 0
+
+    async def _on_sent() -> None:
+        nonlocal sent
+        sent += 1
+
+    client.on_commands_sent = _on_sent
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(client.queue_actuator_value(it_id, actuator_id, 0.0, duration_ms=0) for it_id, actuator_id in keys),
+        return_exceptions=True,
+    )
+    batched = time.perf_counter() - start
+    failed = sum(isinstance(r, Exception) for r in results)
+    print(
+        f"commandes en file             {count / batched:8.1f} cmd/s   ({failed} échecs, "
+        f"{sent} refresh déclenché(s), fenêtre {client.command_window * 1000:.0f} ms incluse)"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    api, coordinator = load_modules()
+
+    mock = MockHemis(
+        actuators=args.actuators,
+        sensors=args.sensors,
+        latency=args.latency_ms / 1000.0,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        churn=args.churn,
+        etag=args.etag,
+        hang_seconds=args.client_timeout * 4,
+    )
+    runner = await mock.start()
+
+    session = aiohttp.ClientSession()
+    client = api.HemisClient(
+        base_url="",
+        building_id="",
+        token="",
+        email="bench@example.com",
+        password="bench",
+        auth_base_url=mock.base_url,
+        session=session,
+        command_concurrency=args.concurrency,
+        retry_backoff=0.05,
+    )
+    client.timeouts = {k: args.client_timeout for k in client.timeouts}
+
+    try:
+        await client._authenticate()
+        client.building_id, client.base_url = await client.discover_building_and_base_url()
+
+        print(
+            f"mock: {args.actuators} actionneurs, {args.sensors} capteurs, latence {args.latency_ms:.0f} ms, "
+            f"churn {args.churn:.0%}, erreurs {args.error_rate:.0%}, timeouts {args.timeout_rate:.0%}, "
+            f"401 {args.unauthorized_rate:.0%}, etag {'oui' if args.etag else 'non'}"
+        )
+        await bench_refresh(api, coordinator, client, args.iterations)
+        await bench_commands(api, client, mock, args.commands)
+        print(f"requêtes reçues par le mock : {dict(sorted(mock.requests.items()))}")
+    finally:
+        await client.async_close()
+        await session.close()
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--actuators", type=int, default=1000)
+    parser.add_argument("--sensors", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--etag", action="store_true")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--commands", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4, help="command_concurrency du client")
+    parser.add_argument("--client-timeout", type=float, default=2.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark du décodage des réponses /intelligent-things/actuators.
+
+Compare l'ancien chemin (resp.text() puis resp.json() : deux décodages du corps)
+au chemin actuel (une lecture en bytes + décodeur rapide), avec orjson et stdlib.
+
+Usage :
+    python benchmarks/bench_json_decode.py                    # payload synthétique
+    python benchmarks/bench_json_decode.py --payload act.json # payload enregistré
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import api  # noqa: E402
+from mock_server import synth_actuators  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payload", type=Path, help="réponse JSON enregistrée de /intelligent-things/actuators")
+    parser.add_argument("--count", type=int, default=2000, help="nb d'actionneurs synthétiques")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.payload:
+        body = args.payload.read_bytes()
+    else:
+        body = json.dumps(synth_actuators(args.count)).encode()
+
+    def old_path():
+        # resp.text() puis resp.json(content_type=None)
+        text = body.decode("utf-8")
+        json.loads(body.decode("utf-8"))
+        return text
+
+    def new_path_stdlib():
+        api._stdlib_loads(body)
+
+    cases = [("text()+json() [avant]", old_path), ("read()+json stdlib", new_path_stdlib)]
+    if api.orjson is not None:
+        cases.append(("read()+orjson", lambda: api.orjson.loads(body)))
+
+    print(f"payload: {len(body) / 1024:.0f} KiB, {args.repeat} itérations")
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+        print(f"  {name:<24} {best * 1000:8.3f} ms / réponse")
+
+
+if __name__ == "__main__":
+    main()
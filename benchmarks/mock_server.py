@@ -0,0 +1,253 @@
+"""Serveur Hemis local (aiohttp) pour les benchmarks et les essais sans cloud.
+
+Reproduit les endpoints utilisés par HemisClient :
+    POST /users/signin
+    GET  /buildings/mine/infos
+    GET  /hemis/rest/intelligent-things/sensors
+    GET  /hemis/rest/intelligent-things/actuators
+    PUT  /hemis/rest/intelligent-things/{itId}/actuator/{actuatorId}/state
+
+Il synthétise autant de devices que voulu et sait injecter de la latence, des
+401, des 5xx et des requêtes qui ne répondent jamais (timeouts).
+
+Usage :
+    python benchmarks/mock_server.py --port 8080 --actuators 2000 --latency-ms 80
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+from dataclasses import dataclass, field
+import json
+import random
+import time
+from typing import Any
+
+from aiohttp import web
+
+HEMIS_PREFIX = "/hemis/rest"
+
+
+def synth_actuators(count: int) -> list[dict]:
+    """Payload proche d'une vraie réponse Hemis (rollers, relais, fil pilote)."""
+    kinds = [
+        ("VERTICAL_ROLLER", ["BRIEXT"], 1.0),
+        (None, ["BRI"], 500.0),
+        ("PILOT_WIRE_THERMOSTAT_THREE_LEVELS", ["TMP"], 2.0),
+    ]
+    out = []
+    for i in range(count):
+        rep, factors, maxv = kinds[i % len(kinds)]
+        state = {"value": (i % 7) / 7.0, "maxActionValue": maxv, "timestamp": 1700000000000 + i}
+        out.append(
+            {
+                "itId": f"EnOcean:{i // 4:08X}",
+                "actuatorId": f"ACT%{i % 4}:{i}",
+                "name": f"Actionneur {i}",
+                "actionningRepresentation": rep,
+                "factors": factors,
+                "hardwareState": dict(state),
+                "state": dict(state),
+                "targetState": dict(state),
+                "zoneId": f"zone-{i % 25}",
+            }
+        )
+    return out
+
+
+def synth_sensors(count: int) -> list[dict]:
+    kinds = [("TMP", lambda i: 19.0 + (i % 40) / 10.0), ("BATTERY_LEVEL", lambda i: 0.5 + (i % 50) / 100.0), ("SWS", lambda i: i % 2)]
+    out = []
+    for i in range(count):
+        state_id, value = kinds[i % len(kinds)]
+        out.append({"id": f"SENSOR-{i:05d}", "state": {"id": state_id, "value": value(i)}})
+    return out
+
+
+def make_token(ttl: float) -> str:
+    """Token au format JWT (seul `exp` compte pour le client)."""
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": int(time.time() + ttl), "n": random.random()}).encode())
+    return f"mock.{payload.decode().rstrip('=')}.sig"
+
+
+@dataclass
+class MockHemis:
+    actuators: int = 500
+    sensors: int = 200
+    buildings: int = 1
+    latency: float = 0.0            # secondes ajoutées à chaque requête
+    error_rate: float = 0.0         # proportion de 503
+    timeout_rate: float = 0.0       # proportion de requêtes qui ne répondent jamais
+    unauthorized_rate: float = 0.0  # proportion de 401 sur des tokens pourtant valides
+    token_ttl: float = 3600.0
+    churn: float = 0.0              # proportion d'actionneurs / capteurs modifiés à chaque GET
+    etag: bool = False              # ETag + 304 sur les GET de listes
+    hang_seconds: float = 120.0
+
+    requests: dict[str, int] = field(default_factory=dict)
+    _tokens: dict[str, float] = field(default_factory=dict)
+    _actuators: dict[tuple[str, str], dict[str, Any]] = field(default_factory=dict)
+    _sensors: list[dict[str, Any]] = field(default_factory=list)
+    _version: int = 0
+    _base_url: str = ""
+
+    def __post_init__(self) -> None:
+        self._actuators = {(a["itId"], a["actuatorId"]): a for a in synth_actuators(self.actuators)}
+        self._sensors = synth_sensors(self.sensors)
+
+    # ------------------------------------------------------------------ app
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._chaos])
+        app.router.add_post("/users/signin", self._signin)
+        app.router.add_get("/buildings/mine/infos", self._buildings)
+        app.router.add_get(f"{HEMIS_PREFIX}/intelligent-things/sensors", self._get_sensors)
+        app.router.add_get(f"{HEMIS_PREFIX}/intelligent-things/actuators", self._get_actuators)
+        app.router.add_put(f"{HEMIS_PREFIX}/intelligent-things/{{it_id}}/actuator/{{actuator_id}}/state", self._put_state)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> web.AppRunner:
+        """Démarre le serveur dans la boucle courante ; `base_url` est alors renseigné."""
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        # port réel si port=0
+        self._base_url = f"http://{host}:{runner.addresses[0][1]}"
+        return runner
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @property
+    def hemis_base_url(self) -> str:
+        return f"{self._base_url}{HEMIS_PREFIX}"
+
+    # -------------------------------------------------------------- helpers
+
+    @web.middleware
+    async def _chaos(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        key = f"{request.method} {route}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        r = random.random()
+        if r < self.timeout_rate:
+            await asyncio.sleep(self.hang_seconds)
+        elif r < self.timeout_rate + self.error_rate:
+            return web.Response(status=503, text="mock: service unavailable")
+        return await handler(request)
+
+    def _authorized(self, request: web.Request) -> bool:
+        auth = request.headers.get("Authorization", "")
+        token = auth.removeprefix("Bearer ")
+        exp = self._tokens.get(token)
+        if exp is None or exp < time.time():
+            return False
+        return random.random() >= self.unauthorized_rate
+
+    def _mutate(self) -> None:
+        if not self.churn:
+            return
+        acts = list(self._actuators.values())
+        for act in random.sample(acts, int(len(acts) * self.churn)):
+            act["hardwareState"]["value"] = round(random.random(), 2)
+        for s in random.sample(self._sensors, int(len(self._sensors) * self.churn)):
+            s["state"]["value"] = round(random.uniform(18.0, 23.0), 2)
+        self._version += 1
+
+    def _list_response(self, request: web.Request, payload: list) -> web.Response:
+        if not self._authorized(request):
+            return web.Response(status=401, text="mock: unauthorized")
+        self._mutate()
+        if self.etag:
+            tag = f'"v{self._version}"'
+            if request.headers.get("If-None-Match") == tag:
+                return web.Response(status=304, headers={"ETag": tag})
+            return web.json_response(payload, headers={"ETag": tag})
+        return web.json_response(payload)
+
+    # ------------------------------------------------------------- handlers
+
+    async def _signin(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("email") or not body.get("password"):
+            return web.Response(status=401, text="mock: bad credentials")
+        token = make_token(self.token_ttl)
+        self._tokens[token] = time.time() + self.token_ttl
+        return web.json_response({"token": token})
+
+    async def _buildings(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return web.Response(status=401)
+        return web.json_response(
+            [{"buildingId": f"MOCK-BUILDING-{i:04d}", "hemis_base_url": self.hemis_base_url} for i in range(self.buildings)]
+        )
+
+    async def _get_sensors(self, request: web.Request) -> web.Response:
+        return self._list_response(request, self._sensors)
+
+    async def _get_actuators(self, request: web.Request) -> web.Response:
+        return self._list_response(request, list(self._actuators.values()))
+
+    async def _put_state(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return web.Response(status=401)
+        act = self._actuators.get((request.match_info["it_id"], request.match_info["actuator_id"]))
+        if act is None:
+            return web.Response(status=404, text="mock: unknown actuator")
+        body = await request.json()
+        act["targetState"]["value"] = body["value"]
+        act["hardwareState"]["value"] = body["value"]
+        self._version += 1
+        return web.Response(status=204)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--actuators", type=int, default=500)
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--buildings", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=float, default=3600.0)
+    parser.add_argument("--churn", type=float, default=0.0)
+    parser.add_argument("--etag", action="store_true")
+    args = parser.parse_args()
+
+    mock = MockHemis(
+        actuators=args.actuators,
+        sensors=args.sensors,
+        buildings=args.buildings,
+        latency=args.latency_ms / 1000.0,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        token_ttl=args.token_ttl,
+        churn=args.churn,
+        etag=args.etag,
+    )
+
+    async def _run() -> None:
+        runner = await mock.start(args.host, args.port)
+        print(f"Mock Hemis on {mock.base_url} (hemis_base_url={mock.hemis_base_url})")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from .api import Actuator, Sensor
+
+
+def is_roller(act: Actuator) -> bool:
+    return act.representation == "VERTICAL_ROLLER" or "BRIEXT" in act.factors
+
+
+def is_relay_light(act: Actuator) -> bool:
+    """
+    Relais EnOcean typiques:
+    - factors contient "BRI"
+    - actionningRepresentation est souvent None
+    - maxActionValue souvent 500 (on s'en sert juste comme indice)
+    - state.value 0/1
+    """
+    if "BRI" not in act.factors:
+        return False
+    if act.representation is not None:
+        # on évite d’attraper des trucs “spéciaux”
+        return False
+    return True
+
+
+def is_pilot_wire(act: Actuator) -> bool:
+    return act.representation == "PILOT_WIRE_THERMOSTAT_THREE_LEVELS"
+
+
+# états de capteurs exposés par la plateforme sensor (cf. sensor.SUPPORTED)
+SENSOR_STATE_IDS = frozenset({"TMP", "BATTERY_LEVEL", "SWS"})
+
+
+def is_supported_sensor(sensor: Sensor) -> bool:
+    return sensor.state_id in SENSOR_STATE_IDS
+
+
+@dataclass(frozen=True, slots=True)
+class ClassificationRule:
+    platform: str
+    kind: str  # "actuator" | "sensor"
+    matches: Callable[[Any], bool]
+
+
+# Table des règles, évaluée une fois par changement de topologie. Chaque règle est
+# indépendante : un device peut apparaître dans plusieurs plateformes.
+# Pour une nouvelle plateforme / un nouveau type de device : ajouter une règle ici.
+RULES: list[ClassificationRule] = [
+    ClassificationRule("cover", "actuator", is_roller),
+    ClassificationRule("light", "actuator", is_relay_light),
+    ClassificationRule("climate", "actuator", is_pilot_wire),
+    ClassificationRule("sensor", "sensor", is_supported_sensor),
+]
+
+
+def topology_fingerprint(sensors: Sequence[Sensor], actuators: Sequence[Actuator]) -> int:
+    """Empreinte de ce qui détermine la classification (identités + type), pas des valeurs."""
+    return hash(
+        (
+            frozenset((a.it_id, a.actuator_id, a.representation, a.factors) for a in actuators),
+            frozenset((s.id, s.state_id) for s in sensors),
+        )
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceBuckets:
+    """Clés des devices par plateforme (Actuator.key / Sensor.key), pas les objets.
+
+    Les buckets survivent aux polls tant que la topologie ne change pas : les objets
+    à jour se résolvent via les index du snapshot courant (cf. HemisCoordinator.devices).
+    """
+
+    fingerprint: int
+    by_platform: dict[str, tuple[Any, ...]]
+    kinds: dict[str, str]  # plateforme -> "actuator" | "sensor"
+
+    def get(self, platform: str) -> tuple[Any, ...]:
+        return self.by_platform.get(platform, ())
+
+
+def classify(
+    sensors: Sequence[Sensor],
+    actuators: Sequence[Actuator],
+    fingerprint: int,
+    rules: Sequence[ClassificationRule] = RULES,
+) -> DeviceBuckets:
+    """Répartit les clés des actionneurs et capteurs par plateforme en un seul passage sur chaque liste."""
+    actuator_rules = [r for r in rules if r.kind == "actuator"]
+    sensor_rules = [r for r in rules if r.kind == "sensor"]
+    buckets: dict[str, list[Any]] = {r.platform: [] for r in rules}
+
+    for act in actuators:
+        for rule in actuator_rules:
+            if rule.matches(act):
+                buckets[rule.platform].append(act.key)
+    for sensor in sensors:
+        for rule in sensor_rules:
+            if rule.matches(sensor):
+                buckets[rule.platform].append(sensor.key)
+
+    return DeviceBuckets(
+        fingerprint,
+        {platform: tuple(keys) for platform, keys in buckets.items()},
+        {r.platform: r.kind for r in rules},
+    )
@@ -14,75 +14,11 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.const import UnitOfTemperature
 from homeassistant.components.climate import HVACAction
 
-from .const import DOMAIN
-from .coordinator import HemisCoordinator
-
-
-PRESET_AWAY = "away"
-PRESET_ECO = "eco"
-PRESET_COMFORT = "comfort"
-
-PRESETS = [PRESET_AWAY, PRESET_ECO, PRESET_COMFORT]
-
-
-def _is_pilot_wire(act: dict) -> bool:
-    return act.get("actionningRepresentation") == "PILOT_WIRE_THERMOSTAT_THREE_LEVELS"
-
-
-def _get_value(act: dict) -> float | None:
-    for k in ("hardwareState", "state", "targetState"):
-        v = (act.get(k) or {}).get("value")
-        if v is None:
-            continue
-        try:
-            return float(v)
-        except (TypeError, ValueError):
-            return None
-    return None
-
-
-def _get_max_action_value(act: dict) -> float | None:
-    for k in ("hardwareState", "state", "targetState"):
-        v = (act.get(k) or {}).get("maxActionValue")
-        if v is None:
-            continue
-        try:
-            return float(v)
-        except (TypeError, ValueError):
-            return None
-    return None
-
-
-def _preset_to_value(act: dict, preset: str) -> float:
-    """
-    Mapping intelligent:
-    - si maxActionValue <= 1 : on suppose 0.0 / 0.5 / 1.0
-    - sinon : 0 / 1 / 2
-    """
-    maxv = _get_max_action_value(act)
-    if maxv is not None and maxv <= 1.0:
-        mapping = {PRESET_AWAY: 0.0, PRESET_ECO: 0.5, PRESET_COMFORT: 1.0}
-    else:
-        mapping = {PRESET_AWAY: 0.0, PRESET_ECO: 1.0, PRESET_COMFORT: 2.0}
-    return mapping[preset]
-
-
-def _value_to_preset(act: dict, value: float) -> str:
-    maxv = _get_max_action_value(act)
-    if maxv is not None and maxv <= 1.0:
-        # 0 / 0.5 / 1
-        if value < 0.25:
-            return PRESET_AWAY
-        if value < 0.75:
-            return PRESET_ECO
-        return PRESET_COMFORT
-    else:
-        # 0 / 1 / 2 (ou approchant)
-        if value < 0.5:
-            return PRESET_AWAY
-        if value < 1.5:
-            return PRESET_ECO
-        return PRESET_COMFORT
+from .api import Actuator
+from .const import DOMAIN, CONF_GROUP_ENTITIES
+from .coordinator import HemisCoordinator, actuator_context
+from .entity import actuator_unique_id, async_track_platform_devices, raise_on_group_errors
+from .presets import PRESET_AWAY, PRESET_ECO, PRESETS, preset_to_value, value_to_preset
 
 
 async def async_setup_entry(
@@ -90,14 +26,13 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    coordinator: HemisCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-
-    entities: list[UbiantHemisPilotWireClimate] = []
-    for act in coordinator.data.actuators:
-        if _is_pilot_wire(act):
-            entities.append(UbiantHemisPilotWireClimate(coordinator, entry, act))
-
-    async_add_entities(entities)
+    coordinators: dict[str, HemisCoordinator] = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+    async_track_platform_devices(
+        hass, entry, coordinators, "climate", async_add_entities,
+        lambda coordinator, act: UbiantHemisPilotWireClimate(coordinator, entry, act),
+    )
+    if entry.options.get(CONF_GROUP_ENTITIES, False):
+        async_add_entities(UbiantHemisPilotWireGroup(coordinator) for coordinator in coordinators.values())
 
 
 class UbiantHemisPilotWireClimate(CoordinatorEntity[HemisCoordinator], ClimateEntity):
@@ -107,32 +42,36 @@ class UbiantHemisPilotWireClimate(CoordinatorEntity[HemisCoordinator], ClimateEn
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
     _attr_should_poll = False
 
-    def __init__(self, coordinator: HemisCoordinator, entry: ConfigEntry, actuator: dict) -> None:
-        super().__init__(coordinator)
+    def __init__(self, coordinator: HemisCoordinator, entry: ConfigEntry, actuator: Actuator) -> None:
         self._entry = entry
-        self._actuator_id = actuator["actuatorId"]
-        self._it_id = actuator["itId"]
+        self._actuator_id = actuator.actuator_id
+        self._it_id = actuator.it_id
+        super().__init__(coordinator, context=actuator_context(self._it_id, self._actuator_id))
 
         self._attr_name = f"Hemis Heating {self._actuator_id}"
-        self._attr_unique_id = f"{self._it_id}_{self._actuator_id}".replace(":", "_").replace("%", "_")
+        self._attr_unique_id = actuator_unique_id(self._it_id, self._actuator_id)
+
+    def _get_actuator_live(self) -> Actuator | None:
+        if not self.coordinator.data:
+            return None
+        return self.coordinator.data.get_actuator(self._it_id, self._actuator_id)
 
-    def _get_actuator_live(self) -> dict:
-        for act in self.coordinator.data.actuators:
-            if act.get("actuatorId") == self._actuator_id and act.get("itId") == self._it_id:
-                return act
-        return {}
+    def _get_value(self) -> float | None:
+        return self.coordinator.actuator_value(self._it_id, self._actuator_id)
 
     @property
     def available(self) -> bool:
-        return _get_value(self._get_actuator_live()) is not None
+        # super() : dernier refresh réussi (liste d'actionneurs pas trop périmée)
+        return super().available and self._get_value() is not None
 
     @property
     def hvac_mode(self) -> HVACMode | None:
-        v = _get_value(self._get_actuator_live())
-        if v is None:
+        act = self._get_actuator_live()
+        v = self._get_value()
+        if act is None or v is None:
             return None
         # away = "OFF" côté HA (plus logique visuellement)
-        preset = _value_to_preset(self._get_actuator_live(), v)
+        preset = value_to_preset(act, v)
         return HVACMode.OFF if preset == PRESET_AWAY else HVACMode.HEAT
     
     @property
@@ -150,23 +89,72 @@ class UbiantHemisPilotWireClimate(CoordinatorEntity[HemisCoordinator], ClimateEn
 
     @property
     def preset_mode(self) -> str | None:
-        v = _get_value(self._get_actuator_live())
-        if v is None:
+        act = self._get_actuator_live()
+        v = self._get_value()
+        if act is None or v is None:
             return None
-        return _value_to_preset(self._get_actuator_live(), v)
+        return value_to_preset(act, v)
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         if preset_mode not in PRESETS:
             return
 
         act_live = self._get_actuator_live()
-        value = _preset_to_value(act_live, preset_mode)
+        value = preset_to_value(act_live, preset_mode)
 
-        client = self.hass.data[DOMAIN][self._entry.entry_id]["client"]
-        await client.set_actuator_value(
+        await self.coordinator.async_set_actuator_value(
             it_id=self._it_id,
             actuator_id=self._actuator_id,
             value=value,
             duration_ms=0,
         )
-        await self.coordinator.async_request_refresh()
+
+
+class UbiantHemisPilotWireGroup(CoordinatorEntity[HemisCoordinator], ClimateEntity):
+    """Tous les chauffages fil pilote d'un bâtiment : un preset envoyé en une commande groupée."""
+
+    _attr_supported_features = ClimateEntityFeature.PRESET_MODE
+    _attr_hvac_modes = [HVACMode.HEAT, HVACMode.OFF]
+    _attr_preset_modes = PRESETS
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+
+    def __init__(self, coordinator: HemisCoordinator) -> None:
+        super().__init__(coordinator)
+        building_id = coordinator.client.building_id
+        self._attr_name = f"Hemis All heating {building_id[-6:]}"
+        self._attr_unique_id = f"hemis_group_climate_{building_id}"
+
+    def _presets(self) -> set[str]:
+        presets: set[str] = set()
+        for act in self.coordinator.devices("climate"):
+            v = self.coordinator.actuator_value(act.it_id, act.actuator_id)
+            if v is not None:
+                presets.add(value_to_preset(act, v))
+        return presets
+
+    @property
+    def available(self) -> bool:
+        return super().available and bool(self.coordinator.devices("climate"))
+
+    @property
+    def preset_mode(self) -> str | None:
+        # preset commun à tous les chauffages, sinon indéterminé
+        presets = self._presets()
+        return presets.pop() if len(presets) == 1 else None
+
+    @property
+    def hvac_mode(self) -> HVACMode | None:
+        presets = self._presets()
+        if not presets:
+            return None
+        return HVACMode.OFF if presets == {PRESET_AWAY} else HVACMode.HEAT
+
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+        await self.async_set_preset_mode(PRESET_AWAY if hvac_mode == HVACMode.OFF else PRESET_ECO)
+
+    async def async_set_preset_mode(self, preset_mode: str) -> None:
+        if preset_mode not in PRESETS:
+            return
+        # valeur propre à chaque chauffage (échelle 0..1 ou 0..2 selon maxActionValue)
+        values = {act.key: preset_to_value(act, preset_mode) for act in self.coordinator.devices("climate")}
+        raise_on_group_errors(await self.coordinator.async_set_group(values))
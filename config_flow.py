@@ -3,7 +3,7 @@ from __future__ import annotations
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
@@ -15,7 +15,25 @@ from .const import (
     CONF_BASE_URL,
     CONF_BUILDING_ID,
     CONF_TOKEN,
+    CONF_DISCOVERED_AT,
+    CONF_BUILDINGS,
     AUTH_BASE_URL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_SENSOR_SCAN_INTERVAL,
+    CONF_DEDICATED_SESSION,
+    CONF_METRICS,
+    CONF_SENSOR_AGGREGATE,
+    CONF_SENSOR_WINDOW,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_BATTERY_DEADBAND,
+    CONF_GROUP_ENTITIES,
+    SENSOR_AGGREGATES,
+    DEFAULT_SENSOR_AGGREGATE,
+    DEFAULT_SENSOR_WINDOW,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_SENSOR_SCAN_INTERVAL,
 )
 
 STEP_USER = vol.Schema(
@@ -29,6 +47,11 @@ STEP_USER = vol.Schema(
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> HemisOptionsFlow:
+        return HemisOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None) -> FlowResult:
         errors: dict[str, str] = {}
 
@@ -53,13 +76,19 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         try:
             await client._authenticate()
-            building_id, base_url = await client.discover_building_and_base_url()
+            buildings = await client.discover_buildings()
         except HemisApiError:
             errors["base"] = "auth_failed"
             return self.async_show_form(step_id="user", data_schema=STEP_USER, errors=errors)
         except Exception:
             errors["base"] = "unknown"
             return self.async_show_form(step_id="user", data_schema=STEP_USER, errors=errors)
+        finally:
+            # client temporaire : pas de refresh de token en tâche de fond
+            await client.async_close()
+
+        # le premier bâtiment identifie l'entrée ; les autres sont gérés par la même entrée
+        building_id, base_url = buildings[0]
 
         # Eviter multiples instances
         await self.async_set_unique_id(f"{DOMAIN}_{building_id}")
@@ -71,7 +100,75 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             CONF_TOKEN: client.token,
             CONF_BUILDING_ID: building_id,
             CONF_BASE_URL: base_url,
+            CONF_DISCOVERED_AT: client.discovered_at,
+            CONF_BUILDINGS: [{CONF_BUILDING_ID: bid, CONF_BASE_URL: url} for bid, url in buildings],
         }
 
         title = f"Ubiant Hemis ({building_id[-6:]})"
+        if len(buildings) > 1:
+            title = f"Ubiant Hemis ({building_id[-6:]} +{len(buildings) - 1})"
         return self.async_create_entry(title=title, data=data)
+
+
+class HemisOptionsFlow(config_entries.OptionsFlow):
+    """Bornes du polling adaptatif, cadence des capteurs (en secondes) et session HTTP."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        # entrée passée explicitement : `OptionsFlow.config_entry` n'est injecté qu'à partir de HA 2024.11
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            if user_input[CONF_MAX_SCAN_INTERVAL] < user_input[CONF_MIN_SCAN_INTERVAL]:
+                errors["base"] = "invalid_interval"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL,
+                    default=options.get(CONF_MIN_SCAN_INTERVAL, int(DEFAULT_MIN_SCAN_INTERVAL.total_seconds())),
+                ): vol.All(vol.Coerce(int), vol.Range(min=2, max=3600)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=options.get(CONF_MAX_SCAN_INTERVAL, int(DEFAULT_MAX_SCAN_INTERVAL.total_seconds())),
+                ): vol.All(vol.Coerce(int), vol.Range(min=2, max=3600)),
+                vol.Required(
+                    CONF_SENSOR_SCAN_INTERVAL,
+                    default=options.get(CONF_SENSOR_SCAN_INTERVAL, int(DEFAULT_SENSOR_SCAN_INTERVAL.total_seconds())),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                vol.Required(
+                    CONF_DEDICATED_SESSION,
+                    default=options.get(CONF_DEDICATED_SESSION, False),
+                ): bool,
+                vol.Required(
+                    CONF_METRICS,
+                    default=options.get(CONF_METRICS, False),
+                ): bool,
+                vol.Required(
+                    CONF_SENSOR_AGGREGATE,
+                    default=options.get(CONF_SENSOR_AGGREGATE, DEFAULT_SENSOR_AGGREGATE),
+                ): vol.In(SENSOR_AGGREGATES),
+                vol.Required(
+                    CONF_SENSOR_WINDOW,
+                    default=options.get(CONF_SENSOR_WINDOW, DEFAULT_SENSOR_WINDOW),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Required(
+                    CONF_TEMPERATURE_DEADBAND,
+                    default=options.get(CONF_TEMPERATURE_DEADBAND, 0.0),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=5.0)),
+                vol.Required(
+                    CONF_BATTERY_DEADBAND,
+                    default=options.get(CONF_BATTERY_DEADBAND, 0.0),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=50.0)),
+                vol.Required(
+                    CONF_GROUP_ENTITIES,
+                    default=options.get(CONF_GROUP_ENTITIES, False),
+                ): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
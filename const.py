@@ -8,10 +8,74 @@ CONF_PASSWORD = "password"
 CONF_BASE_URL = "base_url"
 CONF_BUILDING_ID = "building_id"
 CONF_TOKEN = "token"
+CONF_DISCOVERED_AT = "discovered_at"
+# tous les bâtiments du compte : [{building_id, base_url}, ...] (le premier = CONF_BUILDING_ID)
+CONF_BUILDINGS = "buildings"
 
 # Ubiant "hemisphere" API (auth + buildings infos)
 AUTH_BASE_URL = "https://hemisphere.ubiant.com"
 
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
 
+# Polling adaptatif : rapide après une commande / un changement d'actionneur,
+# puis back-off exponentiel quand rien ne bouge (ou que l'API est en erreur).
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL = timedelta(seconds=5)
+DEFAULT_MAX_SCAN_INTERVAL = timedelta(seconds=300)
+FAST_POLL_WINDOW = timedelta(seconds=60)
+
+# Les capteurs (batterie, température) bougent lentement : ils ont leur propre cadence.
+# Ils sont relevés pendant un tick du coordinator : le tick suivant est avancé à leur échéance
+# si le back-off des actionneurs l'aurait repoussé au-delà.
+CONF_SENSOR_SCAN_INTERVAL = "sensor_scan_interval"
+DEFAULT_SENSOR_SCAN_INTERVAL = timedelta(seconds=300)
+
+# actionneurs en erreur : la dernière liste reste servie au plus ce temps, puis le refresh échoue
+ACTUATORS_MAX_STALENESS = timedelta(minutes=10)
+# capteurs en erreur : au-delà de leur intervalle + ce délai, les entités capteurs sont indisponibles
+SENSORS_MAX_STALENESS = timedelta(minutes=10)
+
+# Agrégation optionnelle des capteurs numériques (moins d'écritures d'état et de lignes recorder) :
+# fenêtre glissante de relevés (moyenne/min/max) puis bande morte autour de la dernière valeur publiée.
+CONF_SENSOR_AGGREGATE = "sensor_aggregate"
+CONF_SENSOR_WINDOW = "sensor_window"  # nb de relevés (un par poll des capteurs)
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"  # °C
+CONF_BATTERY_DEADBAND = "battery_deadband"  # %
+SENSOR_AGGREGATES = ["last", "mean", "min", "max"]
+DEFAULT_SENSOR_AGGREGATE = "last"
+DEFAULT_SENSOR_WINDOW = 6
+
+# durée max pendant laquelle une valeur commandée est affichée sans confirmation du cloud
+OPTIMISTIC_TIMEOUT = timedelta(seconds=60)
+
+# entités "groupe" par bâtiment (tous les éclairages, tous les chauffages) : une seule commande groupée
+CONF_GROUP_ENTITIES = "group_entities"
+
+# Volets : position interpolée localement à partir du temps de course appris (course complète 0 -> 100 %).
+# Pas de poll rapide pendant le mouvement : un refresh "sonde" peu avant l'arrivée prévue
+# (position intermédiaire = mesure de la vitesse), puis un refresh de confirmation.
+DEFAULT_COVER_TRAVEL_TIME = 25.0  # secondes
+MIN_COVER_TRAVEL_TIME = 3.0
+MAX_COVER_TRAVEL_TIME = 180.0
+COVER_PROBE_FRACTION = 0.8  # sonde à 80 % de la durée prévue
+MOTION_CONFIRM_MARGIN = 3.0  # secondes après l'arrivée prévue
+
+# Plannings fil pilote : un seul timer sur la prochaine transition de tous les chauffages,
+# les changements dus au même instant partent en une commande groupée par bâtiment.
+SCHEDULE_STORAGE_VERSION = 1
+SCHEDULE_MAX_BATCH = 50  # commandes max par envoi groupé
+SCHEDULE_BATCH_SPACING = 2.0  # secondes entre deux envois d'un même bâtiment
+
+# session HTTP dédiée (connecteur keep-alive propre) au lieu de la session partagée de HA
+CONF_DEDICATED_SESSION = "dedicated_session"
+
+# métriques des chemins chauds (latences, re-auth, durée des refresh...) : diagnostics + capteurs dédiés
+CONF_METRICS = "metrics"
+
+# snapshot persistant (HA Store) : les entités sont créées au démarrage sans attendre le cloud
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # secondes, regroupe les écritures disque
+SNAPSHOT_MAX_AGE = timedelta(hours=24)
+
 PLATFORMS = ["sensor", "cover", "light", "climate"]
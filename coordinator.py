@@ -1,35 +1,529 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+import asyncio
+from dataclasses import dataclass, field
+from datetime import timedelta
+import logging
+import time
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import HemisClient, HemisApiError
-from .const import DEFAULT_SCAN_INTERVAL
+from .api import Actuator, HemisClient, HemisApiError, Sensor
+from .classify import DeviceBuckets, classify, topology_fingerprint
+from .const import (
+    ACTUATORS_MAX_STALENESS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SENSOR_SCAN_INTERVAL,
+    DOMAIN,
+    FAST_POLL_WINDOW,
+    OPTIMISTIC_TIMEOUT,
+    SENSORS_MAX_STALENESS,
+    SNAPSHOT_MAX_AGE,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def actuator_context(it_id: str, actuator_id: str) -> tuple[str, str, str]:
+    """Contexte de listener d'une entité actionneur (cf. async_update_listeners)."""
+    return ("actuator", it_id, actuator_id)
+
+
+def sensor_context(sensor_id: str) -> tuple[str, str]:
+    """Contexte de listener d'une entité capteur."""
+    return ("sensor", sensor_id)
+
+
+# réveille à chaque poll de la voie capteurs, même sans changement (agrégation côté entité)
+SENSOR_LANE_CONTEXT = ("sensor_lane",)
+# réveille quand des devices apparaissent / disparaissent (ajout et retrait d'entités à chaud)
+TOPOLOGY_CONTEXT = ("topology",)
+
+
+def _diff_contexts(old: HemisData, new: HemisData) -> set[tuple]:
+    changed: set[tuple] = set()
+    if old.actuators_by_key is not new.actuators_by_key:
+        for key in old.actuators_by_key.keys() | new.actuators_by_key.keys():
+            if old.actuators_by_key.get(key) != new.actuators_by_key.get(key):
+                changed.add(actuator_context(*key))
+    if old.sensors_by_id is not new.sensors_by_id:
+        for sid in old.sensors_by_id.keys() | new.sensors_by_id.keys():
+            if old.sensors_by_id.get(sid) != new.sensors_by_id.get(sid):
+                changed.add(sensor_context(sid))
+    return changed
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str, building_id: str | None = None) -> Store:
+    """Store du dernier snapshot valide d'une entrée (building_id pour les bâtiments secondaires)."""
+    suffix = f".{building_id}" if building_id else ""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}{suffix}.snapshot")
+
+
+def _same_value(a: float | None, b: float | None) -> bool:
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) < 1e-3
+
+
+@dataclass(slots=True)
+class _OptimisticValue:
+    value: float
+    previous: float | None   # valeur avant la commande : tant que le poll la renvoie, on attend
+    expires_at: float        # time.monotonic()
 
 
 @dataclass
 class HemisData:
-    sensors: list[dict[str, Any]]
-    actuators: list[dict[str, Any]]
+    sensors: list[Sensor]
+    actuators: list[Actuator]
+
+    # index construits une fois par poll -> lookups O(1) côté entités
+    sensors_by_id: dict[str, Sensor] = field(default_factory=dict)
+    actuators_by_key: dict[tuple[str, str], Actuator] = field(default_factory=dict)
+
+    @classmethod
+    def build(
+        cls, sensors: list[Sensor], actuators: list[Actuator], previous: HemisData | None = None
+    ) -> HemisData:
+        # une voie non rafraîchie garde sa liste : on réutilise alors l'index existant
+        if previous is not None and previous.sensors is sensors:
+            sensors_by_id = previous.sensors_by_id
+        else:
+            sensors_by_id = {s.id: s for s in sensors}
+        if previous is not None and previous.actuators is actuators:
+            actuators_by_key = previous.actuators_by_key
+        else:
+            actuators_by_key = {a.key: a for a in actuators}
+        return cls(
+            sensors=sensors,
+            actuators=actuators,
+            sensors_by_id=sensors_by_id,
+            actuators_by_key=actuators_by_key,
+        )
+
+    def get_sensor(self, sensor_id: str) -> Sensor | None:
+        return self.sensors_by_id.get(sensor_id)
+
+    def get_actuator(self, it_id: str, actuator_id: str) -> Actuator | None:
+        return self.actuators_by_key.get((it_id, actuator_id))
+
+    def to_storage(self) -> dict:
+        return {
+            "saved_at": time.time(),
+            "sensors": [s.to_row() for s in self.sensors],
+            "actuators": [a.to_row() for a in self.actuators],
+        }
+
+    @classmethod
+    def from_storage(cls, stored: dict) -> HemisData:
+        return cls.build(
+            [Sensor.from_row(r) for r in stored["sensors"]],
+            [Actuator.from_row(r) for r in stored["actuators"]],
+        )
 
 
 class HemisCoordinator(DataUpdateCoordinator[HemisData]):
-    def __init__(self, hass: HomeAssistant, client: HemisClient) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: HemisClient,
+        min_interval: timedelta = DEFAULT_MIN_SCAN_INTERVAL,
+        max_interval: timedelta = DEFAULT_MAX_SCAN_INTERVAL,
+        sensor_interval: timedelta = DEFAULT_SENSOR_SCAN_INTERVAL,
+        store: Store | None = None,
+    ) -> None:
         super().__init__(
             hass,
-            logger=__import__("logging").getLogger(__name__),
-            name="Ubiant Hemis Coordinator",
+            logger=_LOGGER,
+            name=f"Ubiant Hemis Coordinator ({client.building_id[-6:]})",
             update_interval=DEFAULT_SCAN_INTERVAL,
         )
         self.client = client
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._idle_interval = self._base_interval
+        self._fast_until = 0.0
+        self._sensor_interval = sensor_interval
+        self._next_sensors_poll = 0.0
+        # time.monotonic() du dernier poll réussi de la voie capteurs / de la voie actionneurs
+        self.sensors_polled_at = 0.0
+        self.actuators_polled_at = 0.0
+        # le dernier tick a servi une liste d'actionneurs périmée (endpoint en erreur)
+        self._actuators_stale = False
+        # time.monotonic() des dernières données capteurs valides (cache compris) ; cf. sensors_available
+        self._sensors_ok_at = 0.0
+        self._sensors_were_available = True
+        self._sensors_notified_at = 0.0
+        self._store = store
+        # un seul refresh par lot de commandes, plutôt qu'un par entité
+        client.on_commands_sent = self.async_request_refresh
+        # None = tout le monde est notifié (premier poll, retour après erreur...)
+        self._changed_contexts: set[tuple] | None = None
+        # valeurs commandées, servies aux entités jusqu'à confirmation par un poll
+        self._optimistic: dict[tuple[str, str], _OptimisticValue] = {}
+        # répartition des devices par plateforme, recalculée seulement si la topologie change
+        self._buckets: DeviceBuckets | None = None
+        self._classified_lists: tuple[list[Sensor], list[Actuator]] | None = None
+        self._topology_changed = False
+        # mouvements suivis localement par les entités (volets) : timer du refresh de confirmation
+        self._motions: dict[tuple[str, str], CALLBACK_TYPE] = {}
+
+    async def async_load_snapshot(self) -> bool:
+        """Charge le dernier snapshot persisté comme données courantes ; False si absent/périmé."""
+        if self._store is None:
+            return False
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+        if time.time() - stored.get("saved_at", 0) > SNAPSHOT_MAX_AGE.total_seconds():
+            return False
+        try:
+            data = HemisData.from_storage(stored)
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning("Ignoring unreadable Hemis snapshot: %s", e)
+            return False
+
+        self.data = data
+        # les capteurs du cache sont rafraîchis dès le premier poll
+        self._next_sensors_poll = 0.0
+        # âge réel du cache : il compte dans la durée max de service d'une liste périmée
+        self.actuators_polled_at = time.monotonic() - max(0.0, time.time() - stored.get("saved_at", 0))
+        self._sensors_ok_at = self.actuators_polled_at
+        return True
+
+    @callback
+    def async_stagger(self, offset: float) -> CALLBACK_TYPE:
+        """Décale la phase du polling de `offset` secondes (plusieurs bâtiments : charge étalée)."""
+
+        async def _refresh(_now) -> None:
+            await self.async_refresh()
+
+        return async_call_later(self.hass, offset, _refresh)
+
+    @property
+    def _base_interval(self) -> timedelta:
+        return max(self._min_interval, min(self._max_interval, DEFAULT_SCAN_INTERVAL))
+
+    def set_poll_bounds(
+        self, min_interval: timedelta, max_interval: timedelta, sensor_interval: timedelta
+    ) -> None:
+        """Bornes du polling adaptatif et cadence des capteurs (options de l'intégration)."""
+        if (min_interval, max_interval, sensor_interval) == (
+            self._min_interval, self._max_interval, self._sensor_interval
+        ):
+            return
+        self._sensor_interval = sensor_interval
+        self._next_sensors_poll = min(self._next_sensors_poll, time.monotonic() + sensor_interval.total_seconds())
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._idle_interval = self._base_interval
+        self.update_interval = self._base_interval
+
+    def _adapt_interval(self, changed: set[tuple] | None, failed: bool) -> None:
+        """Choisit le prochain intervalle de poll selon l'activité observée."""
+        now = time.monotonic()
+
+        if failed:
+            # API en erreur : on arrête le mode rapide et on espace les appels
+            self._fast_until = 0.0
+            self._idle_interval = min(self._max_interval, self._idle_interval * 2)
+            self.update_interval = self._idle_interval
+            return
+
+        # un volet en mouvement suivi localement ne déclenche pas le poll rapide
+        actuator_moved = changed is not None and any(
+            c[0] == "actuator" and c[1:] not in self._motions for c in changed
+        )
+        if actuator_moved or self._optimistic:
+            self._fast_until = now + FAST_POLL_WINDOW.total_seconds()
+
+        if now < self._fast_until:
+            self._idle_interval = self._base_interval
+            self.update_interval = self._min_interval
+            return
+
+        if changed is None or changed:
+            self._idle_interval = self._base_interval
+        else:
+            # bâtiment au repos
+            self._idle_interval = min(self._max_interval, self._idle_interval * 2)
+        # les capteurs ne sont relevés que pendant un tick : on n'attend pas au-delà de leur échéance
+        sensors_due = timedelta(seconds=max(0.0, self._next_sensors_poll - now))
+        self.update_interval = min(self._idle_interval, max(self._min_interval, sensors_due))
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Ne réveille que les entités dont le device a changé depuis le dernier poll."""
+        changed, self._changed_contexts = self._changed_contexts, None
+        metrics = self.client.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
+        if changed is None or not self.last_update_success:
+            notified = len(self._listeners)
+            super().async_update_listeners()
+        else:
+            if self.sensors_polled_at != self._sensors_notified_at:
+                changed = changed | {SENSOR_LANE_CONTEXT}
+            if self._topology_changed:
+                changed = changed | {TOPOLOGY_CONTEXT}
+            notified = self._async_notify_contexts(changed)
+        self._sensors_notified_at = self.sensors_polled_at
+        self._topology_changed = False
+        if metrics is not None:
+            metrics.observe("dispatch", time.perf_counter() - start)
+            metrics.record_dispatch(notified)
+
+    @callback
+    def _async_notify_contexts(self, contexts: set[tuple]) -> int:
+        notified = 0
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in contexts:
+                update_callback()
+                notified += 1
+        return notified
+
+    @property
+    def sensors_available(self) -> bool:
+        """False si les capteurs servis sont plus vieux que leur intervalle + SENSORS_MAX_STALENESS."""
+        max_age = self._sensor_interval.total_seconds() + SENSORS_MAX_STALENESS.total_seconds()
+        return time.monotonic() - self._sensors_ok_at <= max_age
+
+    @property
+    def topology(self) -> DeviceBuckets | None:
+        """Classification du snapshot courant (empreinte de topologie + clés des devices par plateforme)."""
+        return self._classify(self.data) if self.data else None
+
+    def devices(self, platform: str) -> tuple:
+        """Actionneurs / capteurs du snapshot courant gérés par `platform` (cf. classify.RULES).
+
+        Objets résolus à chaque appel dans les index du dernier poll : jamais ceux,
+        périmés, du poll qui a produit la classification.
+        """
+        data = self.data
+        if not data:
+            return ()
+        topology = self._classify(data)
+        index = data.actuators_by_key if topology.kinds.get(platform) == "actuator" else data.sensors_by_id
+        return tuple(device for key in topology.get(platform) if (device := index.get(key)) is not None)
+
+    def _classify(self, data: HemisData) -> DeviceBuckets:
+        classified = self._classified_lists
+        if classified is not None and classified[0] is data.sensors and classified[1] is data.actuators:
+            return self._buckets
+        # listes nouvelles (valeurs changées) : on ne reclasse que si l'empreinte de topologie diffère
+        fingerprint = topology_fingerprint(data.sensors, data.actuators)
+        if self._buckets is None or self._buckets.fingerprint != fingerprint:
+            self._buckets = classify(data.sensors, data.actuators, fingerprint)
+        self._classified_lists = (data.sensors, data.actuators)
+        return self._buckets
+
+    def actuator_value(self, it_id: str, actuator_id: str) -> float | None:
+        """Valeur à afficher : la valeur optimiste si une commande est en attente, sinon le dernier poll."""
+        pending = self._optimistic.get((it_id, actuator_id))
+        if pending is not None and pending.expires_at > time.monotonic():
+            return pending.value
+        if not self.data:
+            return None
+        act = self.data.get_actuator(it_id, actuator_id)
+        return act.value if act else None
+
+    async def async_set_actuator_value(
+        self,
+        it_id: str,
+        actuator_id: str,
+        value: float,
+        duration_ms: int = 30000,
+        *,
+        confirm_after: float | None = None,
+    ) -> None:
+        """Envoie une commande et l'affiche tout de suite côté HA (état optimiste).
+
+        `confirm_after` (secondes) : l'entité suit elle-même le mouvement (volet) ;
+        pas de valeur optimiste ni de poll rapide, un refresh de confirmation à cette échéance.
+        """
+        key = (it_id, actuator_id)
+        if confirm_after is not None:
+            self.async_track_motion(it_id, actuator_id, confirm_after)
+        else:
+            self._async_set_optimistic({key: value})
+
+        try:
+            await self.client.queue_actuator_value(it_id, actuator_id, value, duration_ms)
+        except HemisApiError:
+            self._async_drop_optimistic([key])
+            self.async_cancel_motion(it_id, actuator_id)
+            raise
+
+    async def async_set_group(
+        self, values: dict[tuple[str, str], float], duration_ms: int = 0
+    ) -> dict[tuple[str, str], Exception | None]:
+        """Commande groupée : envois parallèles bornés, résultat par actionneur, un seul refresh à la fin."""
+        self._async_set_optimistic(values)
+        results = await self.client.set_actuator_values({key: (v, duration_ms) for key, v in values.items()})
+        self._async_drop_optimistic([key for key, error in results.items() if error is not None])
+        await self.async_request_refresh()
+        return results
+
+    @callback
+    def _async_set_optimistic(self, values: dict[tuple[str, str], float]) -> None:
+        expires_at = time.monotonic() + OPTIMISTIC_TIMEOUT.total_seconds()
+        for key, value in values.items():
+            act = self.data.get_actuator(*key) if self.data else None
+            self._optimistic[key] = _OptimisticValue(
+                value=value,
+                previous=act.value if act else None,
+                expires_at=expires_at,
+            )
+        self._async_notify_contexts({actuator_context(*key) for key in values})
+
+        # poll rapide le temps que les devices appliquent la commande
+        self._fast_until = time.monotonic() + FAST_POLL_WINDOW.total_seconds()
+        self.update_interval = self._min_interval
+
+    @callback
+    def _async_drop_optimistic(self, keys: list[tuple[str, str]]) -> None:
+        dropped = {actuator_context(*key) for key in keys if self._optimistic.pop(key, None) is not None}
+        if dropped:
+            self._async_notify_contexts(dropped)
+
+    @callback
+    def async_track_motion(self, it_id: str, actuator_id: str, confirm_after: float) -> None:
+        """Mouvement suivi par l'entité : ses changements ne relancent pas le poll rapide,
+        un refresh est fait dans `confirm_after` secondes (remplace l'échéance précédente)."""
+        key = (it_id, actuator_id)
+        self.async_cancel_motion(it_id, actuator_id)
+
+        async def _confirm(_now) -> None:
+            # le mouvement reste "suivi" pendant le refresh : l'arrivée ne relance pas le poll rapide
+            try:
+                await self.async_refresh()
+            finally:
+                if self._motions.get(key) is unsub:
+                    del self._motions[key]
+                    # l'entité n'a pas réagi au refresh (valeur inchangée : bloqué, commande ignorée,
+                    # position déjà remontée) : on la réveille quand même pour qu'elle conclue
+                    self._async_notify_contexts({actuator_context(*key)})
+
+        unsub = async_call_later(self.hass, confirm_after, _confirm)
+        self._motions[key] = unsub
+
+    def is_motion_tracked(self, it_id: str, actuator_id: str) -> bool:
+        """False une fois l'échéance de confirmation passée (ou le mouvement annulé)."""
+        return (it_id, actuator_id) in self._motions
+
+    @callback
+    def async_cancel_motion(self, it_id: str, actuator_id: str) -> None:
+        unsub = self._motions.pop((it_id, actuator_id), None)
+        if unsub is not None:
+            unsub()
+
+    async def async_shutdown(self) -> None:
+        for key in list(self._motions):
+            self.async_cancel_motion(*key)
+        await super().async_shutdown()
+
+    def _reconcile_optimistic(self, data: HemisData) -> set[tuple]:
+        """Retire les valeurs optimistes confirmées, contredites ou expirées par le nouveau snapshot."""
+        dropped: set[tuple] = set()
+        now = time.monotonic()
+        for key, pending in list(self._optimistic.items()):
+            act = data.actuators_by_key.get(key)
+            polled = act.value if act else None
+            if pending.expires_at > now and _same_value(polled, pending.previous) \
+                    and not _same_value(polled, pending.value):
+                # commande pas encore appliquée par le device
+                continue
+            del self._optimistic[key]
+            dropped.add(actuator_context(*key))
+        return dropped
 
     async def _async_update_data(self) -> HemisData:
+        metrics = self.client.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
         try:
-            sensors = await self.client.get_sensors()
-            actuators = await self.client.get_actuators()
-            return HemisData(sensors=sensors, actuators=actuators)
-        except HemisApiError as e:
-            raise UpdateFailed(str(e)) from e
+            data = await self._async_fetch_data()
+        except UpdateFailed:
+            self._adapt_interval(None, failed=True)
+            if metrics is not None:
+                metrics.inc("refresh_failed")
+            raise
+        finally:
+            if metrics is not None:
+                metrics.observe("refresh", time.perf_counter() - start)
+        # actionneurs en erreur (liste périmée servie) : même back-off qu'un refresh en échec
+        self._adapt_interval(self._changed_contexts, failed=self._actuators_stale)
+        if self._store is not None and (self._changed_contexts is None or self._changed_contexts):
+            self._store.async_delay_save(self._snapshot_to_store, SNAPSHOT_SAVE_DELAY)
+        return data
+
+    def _snapshot_to_store(self) -> dict:
+        return self.data.to_storage()
+
+    async def _async_fetch_data(self) -> HemisData:
+        previous = self.data
+        # Deux "voies" : les actionneurs à chaque tick, les capteurs (batterie, température)
+        # seulement quand leur propre intervalle est écoulé.
+        fetch_sensors = previous is None or time.monotonic() >= self._next_sensors_poll
+
+        # Les deux endpoints partent en parallèle : la latence d'un poll = le plus lent des deux
+        results = await asyncio.gather(
+            self.client.get_actuators(),
+            *((self.client.get_sensors(),) if fetch_sensors else ()),
+            return_exceptions=True,
+        )
+        actuators = results[0]
+        sensors = results[1] if fetch_sensors else previous.sensors
+
+        for res in (sensors, actuators):
+            if isinstance(res, BaseException) and not isinstance(res, HemisApiError):
+                raise res
+
+        # Même traitement d'un échec des actionneurs à chaque tick, que la voie capteurs tourne ou non :
+        # la dernière liste est servie tant qu'elle a moins de ACTUATORS_MAX_STALENESS.
+        self._actuators_stale = isinstance(actuators, HemisApiError)
+        if self._actuators_stale and (
+            previous is None
+            or time.monotonic() - self.actuators_polled_at > ACTUATORS_MAX_STALENESS.total_seconds()
+        ):
+            if isinstance(sensors, HemisApiError):
+                raise UpdateFailed(f"sensors: {sensors} / actuators: {actuators}") from actuators
+            raise UpdateFailed(str(actuators)) from actuators
+
+        if isinstance(sensors, HemisApiError):
+            if previous is None:
+                raise UpdateFailed(str(sensors)) from sensors
+            _LOGGER.warning("Sensors fetch failed, keeping last snapshot: %s", sensors)
+            sensors = previous.sensors
+        elif fetch_sensors:
+            self.sensors_polled_at = self._sensors_ok_at = time.monotonic()
+            self._next_sensors_poll = self.sensors_polled_at + self._sensor_interval.total_seconds()
+        if isinstance(actuators, HemisApiError):
+            _LOGGER.warning("Actuators fetch failed, keeping last snapshot: %s", actuators)
+            actuators = previous.actuators
+        else:
+            self.actuators_polled_at = time.monotonic()
+
+        metrics = self.client.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
+        data = HemisData.build(sensors, actuators, previous)
+        dropped = self._reconcile_optimistic(data)
+        sensors_available = self.sensors_available
+        if previous is not None and self.last_update_success and sensors_available == self._sensors_were_available:
+            self._changed_contexts = _diff_contexts(previous, data) | dropped
+        else:
+            # (la voie capteurs qui devient (in)disponible concerne toutes les entités capteurs)
+            self._changed_contexts = None
+        self._sensors_were_available = sensors_available
+        if self._buckets is not None and previous is not None:
+            # même listes -> pas de reclassification ; sinon comparaison des empreintes seulement
+            fingerprint = self._buckets.fingerprint
+            self._topology_changed |= self._classify(data).fingerprint != fingerprint
+        if metrics is not None:
+            metrics.observe("snapshot_diff", time.perf_counter() - start)
+        return data
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from datetime import timedelta
+import time
 from typing import Any
 
 from homeassistant.components.cover import (
@@ -7,29 +10,34 @@ from homeassistant.components.cover import (
     CoverEntityFeature,
     ATTR_POSITION,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
-
+from .api import Actuator, HemisApiError
+from .const import (
+    DOMAIN,
+    COVER_PROBE_FRACTION,
+    DEFAULT_COVER_TRAVEL_TIME,
+    MAX_COVER_TRAVEL_TIME,
+    MIN_COVER_TRAVEL_TIME,
+    MOTION_CONFIRM_MARGIN,
+)
+from .coordinator import actuator_context
+from .entity import actuator_unique_id, async_track_platform_devices
 
-def _is_roller(act: dict) -> bool:
-    rep = act.get("actionningRepresentation")
-    factors = act.get("factors") or []
-    return rep == "VERTICAL_ROLLER" or "BRIEXT" in factors
+ATTR_TRAVEL_TIME = "travel_time"
 
-
-def _get_value(act: dict) -> float | None:
-    # On préfère hardwareState.value puis targetState/state
-    for k in ("hardwareState", "state", "targetState"):
-        v = (act.get(k) or {}).get("value")
-        if v is not None:
-            try:
-                return float(v)
-            except (TypeError, ValueError):
-                return None
-    return None
+# rafraîchissement de la position interpolée pendant le mouvement
+MOTION_UPDATE_INTERVAL = timedelta(seconds=1)
+# écart de position (0..1) considéré comme "arrivé"
+POSITION_TOLERANCE = 0.02
+# déplacement minimal pour apprendre la vitesse (en dessous, la latence de démarrage domine)
+MIN_LEARN_DISTANCE = 0.1
+# poids d'une nouvelle mesure dans la moyenne du temps de course
+LEARN_RATE = 0.3
 
 
 async def async_setup_entry(
@@ -37,46 +45,108 @@ async def async_setup_entry(
     entry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-    entities: list[UbiantHemisCover] = []
+    coordinators = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+    async_track_platform_devices(
+        hass, entry, coordinators, "cover", async_add_entities,
+        lambda coordinator, act: UbiantHemisCover(coordinator, entry, act),
+    )
+
+
+@dataclass(slots=True)
+class _Motion:
+    start: float         # position 0..1 au départ
+    target: float
+    started_at: float    # time.monotonic()
+    travel_time: float   # secondes pour une course complète
+    final: bool = False  # False : prochaine échéance = sonde ; True : confirmation finale
+
+    @property
+    def duration(self) -> float:
+        return abs(self.target - self.start) * self.travel_time
+
+    @property
+    def confirm_after(self) -> float:
+        if self.final:
+            return self.duration + MOTION_CONFIRM_MARGIN
+        return self.duration * COVER_PROBE_FRACTION
 
-    for act in (coordinator.data.actuators if coordinator.data else []):
-        if _is_roller(act):
-            entities.append(UbiantHemisCover(coordinator, entry, act))
+    def position(self, now: float) -> float:
+        done = (now - self.started_at) / self.travel_time
+        if self.target >= self.start:
+            return min(self.target, self.start + done)
+        return max(self.target, self.start - done)
 
-    async_add_entities(entities)
+    def moving(self, now: float) -> bool:
+        return now - self.started_at < self.duration
 
+    def between(self, value: float) -> bool:
+        low, high = sorted((self.start, self.target))
+        return low - POSITION_TOLERANCE <= value <= high + POSITION_TOLERANCE
 
-class UbiantHemisCover(CoordinatorEntity, CoverEntity):
+
+class UbiantHemisCover(CoordinatorEntity, RestoreEntity, CoverEntity):
     _attr_supported_features = CoverEntityFeature.SET_POSITION
     _attr_device_class = "shutter"
 
-    def __init__(self, coordinator, entry, actuator: dict):
-        super().__init__(coordinator)
+    def __init__(self, coordinator, entry, actuator: Actuator):
         self._entry = entry
-        self._actuator_id = actuator["actuatorId"]
-        self._it_id = actuator["itId"]
+        self._actuator_id = actuator.actuator_id
+        self._it_id = actuator.it_id
+        super().__init__(coordinator, context=actuator_context(self._it_id, self._actuator_id))
 
         self._attr_name = f"Hemis Volet {self._actuator_id}"
-        self._attr_unique_id = f"{self._it_id}_{self._actuator_id}".replace(":", "_").replace("%", "_")
+        self._attr_unique_id = actuator_unique_id(self._it_id, self._actuator_id)
+
+        # temps de course appris (persisté dans les attributs d'état)
+        self._travel_time = DEFAULT_COVER_TRAVEL_TIME
+        self._motion: _Motion | None = None
+        self._unsub_tick: CALLBACK_TYPE | None = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        last = await self.async_get_last_state()
+        if last is not None:
+            try:
+                self._travel_time = self._clamp_travel_time(float(last.attributes[ATTR_TRAVEL_TIME]))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._stop_tick()
+        await super().async_will_remove_from_hass()
 
-    def _get_actuator_live(self) -> dict:
-        for act in (self.coordinator.data.actuators if self.coordinator.data else []):
-            if act.get("actuatorId") == self._actuator_id and act.get("itId") == self._it_id:
-                return act
-        return {}
+    def _get_value(self) -> float | None:
+        return self.coordinator.actuator_value(self._it_id, self._actuator_id)
 
     @property
     def available(self) -> bool:
-        return _get_value(self._get_actuator_live()) is not None
+        # super() : dernier refresh réussi (liste d'actionneurs pas trop périmée)
+        return super().available and self._get_value() is not None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return {ATTR_TRAVEL_TIME: round(self._travel_time, 1)}
 
     @property
     def current_cover_position(self) -> int | None:
-        v = _get_value(self._get_actuator_live())
+        if self._motion is not None:
+            v = self._motion.position(time.monotonic())
+        else:
+            v = self._get_value()
         if v is None:
             return None
         return max(0, min(100, round(v * 100)))
 
+    @property
+    def is_opening(self) -> bool:
+        m = self._motion
+        return m is not None and m.target > m.start and m.moving(time.monotonic())
+
+    @property
+    def is_closing(self) -> bool:
+        m = self._motion
+        return m is not None and m.target < m.start and m.moving(time.monotonic())
+
     @property
     def is_closed(self) -> bool | None:
         pos = self.current_cover_position
@@ -91,13 +161,109 @@ class UbiantHemisCover(CoordinatorEntity, CoverEntity):
 
         value = max(0.0, min(1.0, float(pos) / 100.0))
 
-        client = self.hass.data[DOMAIN][self._entry.entry_id]["client"]
-        # duration optionnel : tu peux le laisser, ou passer un truc court
-        await client.set_actuator_value(
-            it_id=self._it_id,
-            actuator_id=self._actuator_id,
-            value=value,
-            duration_ms=30000,
+        now = time.monotonic()
+        current = self._motion.position(now) if self._motion is not None else self._get_value()
+        if current is not None and abs(value - current) > POSITION_TOLERANCE:
+            self._motion = _Motion(current, value, now, self._travel_time)
+            self._start_tick()
+        else:
+            # position inconnue ou déjà atteinte : valeur optimiste classique
+            self._end_motion()
+        self.async_write_ha_state()
+
+        try:
+            await self.coordinator.async_set_actuator_value(
+                it_id=self._it_id,
+                actuator_id=self._actuator_id,
+                value=value,
+                duration_ms=30000,
+                confirm_after=self._motion.confirm_after if self._motion is not None else None,
+            )
+        except HemisApiError:
+            self._end_motion()
+            self.async_write_ha_state()
+            raise
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        motion = self._motion
+        v = self._get_value()
+        if motion is not None and v is not None:
+            self._update_motion(motion, v, time.monotonic())
+        super()._handle_coordinator_update()
+
+    @callback
+    def _update_motion(self, motion: _Motion, v: float, now: float) -> None:
+        """Confronte le mouvement suivi à la position remontée par le poll et apprend la vitesse."""
+        elapsed = now - motion.started_at
+        distance = abs(motion.target - motion.start)
+
+        if abs(v - motion.target) <= POSITION_TOLERANCE:
+            # arrivé avant la fin prévue : le temps écoulé est un majorant de la course, lissé
+            # comme les autres relevés ; avant la sonde, l'arrivée a pu précéder le poll de loin
+            probed = motion.final or elapsed >= motion.confirm_after
+            if probed and elapsed < motion.duration and distance >= MIN_LEARN_DISTANCE:
+                self._learn(elapsed / distance)
+            self._end_motion()
+            return
+
+        moved = abs(v - motion.start)
+        intermediate = moved > POSITION_TOLERANCE and motion.between(v)
+        if intermediate and moved >= MIN_LEARN_DISTANCE:
+            self._learn(elapsed / moved)
+
+        confirming = not self.coordinator.is_motion_tracked(self._it_id, self._actuator_id)
+        if elapsed < motion.confirm_after and not confirming:
+            # poll régulier pendant le mouvement : on garde la trajectoire prévue
+            return
+
+        if not motion.final:
+            if intermediate:
+                # sonde : encore en route, la suite repart de la position observée avec la vitesse apprise
+                self._motion = _Motion(v, motion.target, now, self._travel_time, final=True)
+                delay = self._motion.confirm_after
+            else:
+                # sonde sans mouvement visible (démarrage tardif, remontée du cloud en retard) :
+                # on garde la trajectoire d'origine et on attend sa confirmation finale
+                self._motion = _Motion(motion.start, motion.target, motion.started_at, motion.travel_time, final=True)
+                delay = max(0.0, motion.started_at + self._motion.confirm_after - now)
+            self.coordinator.async_track_motion(self._it_id, self._actuator_id, delay)
+            self._start_tick()
+            return
+
+        # confirmation finale (arrêté en route, bloqué...) : on s'en remet au poll
+        self._end_motion()
+
+    def _learn(self, sample: float) -> None:
+        self._travel_time = self._clamp_travel_time(
+            (1 - LEARN_RATE) * self._travel_time + LEARN_RATE * sample
         )
 
-        await self.coordinator.async_request_refresh()
+    @staticmethod
+    def _clamp_travel_time(value: float) -> float:
+        return max(MIN_COVER_TRAVEL_TIME, min(MAX_COVER_TRAVEL_TIME, value))
+
+    @callback
+    def _start_tick(self) -> None:
+        if self._unsub_tick is None and self.hass is not None:
+            self._unsub_tick = async_track_time_interval(self.hass, self._async_tick, MOTION_UPDATE_INTERVAL)
+
+    @callback
+    def _stop_tick(self) -> None:
+        if self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        # position interpolée ; le suivi s'arrête à l'arrivée prévue (la confirmation viendra du poll)
+        if self._motion is None or not self._motion.moving(time.monotonic()):
+            self._stop_tick()
+        self.async_write_ha_state()
+
+    @callback
+    def _end_motion(self) -> None:
+        if self._motion is not None:
+            self.coordinator.async_cancel_motion(self._it_id, self._actuator_id)
+        self._motion = None
+        self._stop_tick()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN, DOMAIN
+
+TO_REDACT = {CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    data = hass.data[DOMAIN][entry.entry_id]
+    client = data["client"]
+
+    buildings: dict[str, Any] = {}
+    for building_id, coordinator in data["coordinators"].items():
+        c = data["clients"][building_id]
+        snapshot = coordinator.data
+        buildings[building_id] = {
+            "base_url": c.base_url,
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "breaker": {"state": c.breaker.state, "failures": c.breaker.failures},
+            "actuators": len(snapshot.actuators) if snapshot else 0,
+            "sensors": len(snapshot.sensors) if snapshot else 0,
+            "listeners": len(coordinator._listeners),
+            # None si l'option "métriques" est désactivée
+            "metrics": c.metrics.as_dict() if c.metrics is not None else None,
+        }
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "buildings": buildings,
+        "token_expires_at": client._token_expires_at,
+        "connection_stats": client.connection_stats.as_dict() if client.connection_stats else None,
+        "schedules": data["schedules"].as_dict(),
+    }
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .coordinator import TOPOLOGY_CONTEXT, HemisCoordinator
+
+
+def actuator_unique_id(it_id: str, actuator_id: str) -> str:
+    return f"{it_id}_{actuator_id}".replace(":", "_").replace("%", "_")
+
+
+def raise_on_group_errors(results: dict[tuple[str, str], Exception | None]) -> None:
+    """Fait remonter l'échec d'une commande groupée (les envois réussis restent appliqués)."""
+    errors = [e for e in results.values() if e is not None]
+    if errors:
+        raise HomeAssistantError(f"{len(errors)}/{len(results)} Hemis commands failed: {errors[0]}")
+
+
+class PlatformDevices:
+    """Entités d'une plateforme pour un bâtiment, tenues à jour quand la topologie change.
+
+    Seuls les devices ajoutés / retirés sont traités : pas de rechargement de l'entrée
+    (re-login + refetch). L'entrée du registre d'une entité retirée est conservée :
+    si le device revient, l'entité retrouve son entity_id et ses personnalisations.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: HemisCoordinator,
+        platform: str,
+        async_add_entities: AddEntitiesCallback,
+        factory: Callable[[HemisCoordinator, Any], Entity],
+    ) -> None:
+        self.hass = hass
+        self.coordinator = coordinator
+        self.platform = platform
+        self._async_add_entities = async_add_entities
+        self._factory = factory
+        self._entities: dict[Any, Entity] = {}
+        self._fingerprint: int | None = None
+
+    @callback
+    def async_sync(self) -> None:
+        topology = self.coordinator.topology
+        if topology is None or topology.fingerprint == self._fingerprint:
+            return
+        self._fingerprint = topology.fingerprint
+
+        devices = {device.key: device for device in self.coordinator.devices(self.platform)}
+        added = [key for key in devices if key not in self._entities]
+        removed = [key for key in self._entities if key not in devices]
+
+        for key in removed:
+            entity = self._entities.pop(key)
+            if entity.hass is not None:
+                self.hass.async_create_task(entity.async_remove())
+
+        if added:
+            new_entities = []
+            for key in added:
+                entity = self._factory(self.coordinator, devices[key])
+                self._entities[key] = entity
+                new_entities.append(entity)
+            self._async_add_entities(new_entities)
+
+
+@callback
+def async_track_platform_devices(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinators: dict[str, HemisCoordinator],
+    platform: str,
+    async_add_entities: AddEntitiesCallback,
+    factory: Callable[[HemisCoordinator, Any], Entity],
+) -> None:
+    """Crée les entités de `platform` pour chaque bâtiment, puis suit les changements de topologie."""
+    for coordinator in coordinators.values():
+        devices = PlatformDevices(hass, coordinator, platform, async_add_entities, factory)
+        devices.async_sync()
+        entry.async_on_unload(coordinator.async_add_listener(devices.async_sync, TOPOLOGY_CONTEXT))
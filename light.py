@@ -8,38 +8,10 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
-from .coordinator import HemisCoordinator
-
-
-def _is_relay_light(act: dict) -> bool:
-    """
-    Relais EnOcean typiques:
-    - factors contient "BRI"
-    - actionningRepresentation est souvent None
-    - maxActionValue souvent 500 (on s'en sert juste comme indice)
-    - state.value 0/1
-    """
-    factors = act.get("factors") or []
-    rep = act.get("actionningRepresentation")
-    if "BRI" not in factors:
-        return False
-    if rep is not None:
-        # on évite d’attraper des trucs “spéciaux”
-        return False
-    return True
-
-
-def _get_value(act: dict) -> float | None:
-    for k in ("hardwareState", "state", "targetState"):
-        v = (act.get(k) or {}).get("value")
-        if v is None:
-            continue
-        try:
-            return float(v)
-        except (TypeError, ValueError):
-            return None
-    return None
+from .api import Actuator
+from .const import DOMAIN, CONF_GROUP_ENTITIES
+from .coordinator import HemisCoordinator, actuator_context
+from .entity import actuator_unique_id, async_track_platform_devices, raise_on_group_errors
 
 
 async def async_setup_entry(
@@ -47,63 +19,87 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    coordinator: HemisCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-
-    entities: list[UbiantHemisRelayLight] = []
-    for act in coordinator.data.actuators:
-        if _is_relay_light(act):
-            entities.append(UbiantHemisRelayLight(coordinator, entry, act))
-
-    async_add_entities(entities)
+    coordinators: dict[str, HemisCoordinator] = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+    async_track_platform_devices(
+        hass, entry, coordinators, "light", async_add_entities,
+        lambda coordinator, act: UbiantHemisRelayLight(coordinator, entry, act),
+    )
+    if entry.options.get(CONF_GROUP_ENTITIES, False):
+        async_add_entities(UbiantHemisLightGroup(coordinator) for coordinator in coordinators.values())
 
 
 class UbiantHemisRelayLight(CoordinatorEntity[HemisCoordinator], LightEntity):
     pass
 
-    def __init__(self, coordinator: HemisCoordinator, entry: ConfigEntry, actuator: dict) -> None:
-        super().__init__(coordinator)
+    def __init__(self, coordinator: HemisCoordinator, entry: ConfigEntry, actuator: Actuator) -> None:
         self._entry = entry
-        self._actuator_id = actuator["actuatorId"]
-        self._it_id = actuator["itId"]
+        self._actuator_id = actuator.actuator_id
+        self._it_id = actuator.it_id
+        super().__init__(coordinator, context=actuator_context(self._it_id, self._actuator_id))
 
         # Nom “propre” si possible
         self._attr_name = f"Hemis Light {self._actuator_id}"
-        self._attr_unique_id = f"{self._it_id}_{self._actuator_id}".replace(":", "_").replace("%", "_")
+        self._attr_unique_id = actuator_unique_id(self._it_id, self._actuator_id)
 
-    def _get_actuator_live(self) -> dict:
-        for act in self.coordinator.data.actuators:
-            if act.get("actuatorId") == self._actuator_id and act.get("itId") == self._it_id:
-                return act
-        return {}
+    def _get_value(self) -> float | None:
+        return self.coordinator.actuator_value(self._it_id, self._actuator_id)
 
     @property
     def available(self) -> bool:
-        return _get_value(self._get_actuator_live()) is not None
+        # super() : dernier refresh réussi (liste d'actionneurs pas trop périmée)
+        return super().available and self._get_value() is not None
 
     @property
     def is_on(self) -> bool | None:
-        v = _get_value(self._get_actuator_live())
+        v = self._get_value()
         if v is None:
             return None
         # la majorité des relais: 0/1 (parfois float)
         return v >= 0.5
 
     async def async_turn_on(self, **kwargs: Any) -> None:
-        client = self.hass.data[DOMAIN][self._entry.entry_id]["client"]
-        await client.set_actuator_value(
+        await self.coordinator.async_set_actuator_value(
             it_id=self._it_id,
             actuator_id=self._actuator_id,
             value=1.0,
             duration_ms=0,
         )
-        await self.coordinator.async_request_refresh()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
-        client = self.hass.data[DOMAIN][self._entry.entry_id]["client"]
-        await client.set_actuator_value(
+        await self.coordinator.async_set_actuator_value(
             it_id=self._it_id,
             actuator_id=self._actuator_id,
             value=0.0,
             duration_ms=0,
         )
-        await self.coordinator.async_request_refresh()
+
+
+class UbiantHemisLightGroup(CoordinatorEntity[HemisCoordinator], LightEntity):
+    """Tous les relais d'éclairage d'un bâtiment, commandés en une seule commande groupée."""
+
+    def __init__(self, coordinator: HemisCoordinator) -> None:
+        # pas de contexte : l'état dépend de tous les membres
+        super().__init__(coordinator)
+        building_id = coordinator.client.building_id
+        self._attr_name = f"Hemis All lights {building_id[-6:]}"
+        self._attr_unique_id = f"hemis_group_light_{building_id}"
+
+    def _members(self) -> list[tuple[str, str]]:
+        return [act.key for act in self.coordinator.devices("light")]
+
+    @property
+    def available(self) -> bool:
+        return super().available and bool(self._members())
+
+    @property
+    def is_on(self) -> bool | None:
+        values = [v for v in (self.coordinator.actuator_value(*key) for key in self._members()) if v is not None]
+        if not values:
+            return None
+        return any(v >= 0.5 for v in values)
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        raise_on_group_errors(await self.coordinator.async_set_group({key: 1.0 for key in self._members()}))
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        raise_on_group_errors(await self.coordinator.async_set_group({key: 0.0 for key in self._members()}))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+# bornes des histogrammes, en millisecondes (la dernière case = au-delà)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass(slots=True)
+class Histogram:
+    """Histogramme à cases fixes : observe() est O(nb cases), sans allocation."""
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def percentile(self, q: float) -> float | None:
+        """Borne haute de la case contenant le quantile q (approximation)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(float(LATENCY_BUCKETS_MS[i]), self.max_ms) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "last_ms": round(self.last_ms, 2),
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets_ms": dict(zip([*map(str, LATENCY_BUCKETS_MS), "inf"], self.counts)),
+        }
+
+
+@dataclass
+class HemisMetrics:
+    """Métriques des chemins chauds (client HTTP + coordinator).
+
+    Un par bâtiment (client + coordinator) ; les re-login du compte sont comptés sur le
+    bâtiment principal. Quand les métriques sont désactivées, client.metrics vaut None
+    et rien n'est mesuré.
+    """
+
+    latency: dict[str, Histogram] = field(default_factory=dict)       # par endpoint
+    payload_bytes: dict[str, int] = field(default_factory=dict)       # dernière taille reçue, par endpoint
+    counters: dict[str, int] = field(default_factory=dict)            # 401, re-auth, 304, retries...
+    timings: dict[str, Histogram] = field(default_factory=dict)       # refresh, parse, dispatch
+    entities_updated_last: int = 0
+    entities_updated_total: int = 0
+
+    def observe_latency(self, endpoint: str, seconds: float) -> None:
+        hist = self.latency.get(endpoint)
+        if hist is None:
+            hist = self.latency[endpoint] = Histogram()
+        hist.observe(seconds)
+
+    def observe(self, name: str, seconds: float) -> None:
+        hist = self.timings.get(name)
+        if hist is None:
+            hist = self.timings[name] = Histogram()
+        hist.observe(seconds)
+
+    def inc(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_dispatch(self, entities: int) -> None:
+        self.entities_updated_last = entities
+        self.entities_updated_total += entities
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "latency": {k: v.as_dict() for k, v in self.latency.items()},
+            "payload_bytes": dict(self.payload_bytes),
+            "counters": dict(self.counters),
+            "timings": {k: v.as_dict() for k, v in self.timings.items()},
+            "entities_updated_last": self.entities_updated_last,
+            "entities_updated_total": self.entities_updated_total,
+        }
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from .api import Actuator
+
+# Presets fil pilote et leur valeur d'actionneur : partagés par la plateforme climate et les plannings.
+
+PRESET_AWAY = "away"
+PRESET_ECO = "eco"
+PRESET_COMFORT = "comfort"
+
+PRESETS = [PRESET_AWAY, PRESET_ECO, PRESET_COMFORT]
+
+
+def preset_to_value(act: Actuator | None, preset: str) -> float:
+    """
+    Mapping intelligent:
+    - si maxActionValue <= 1 : on suppose 0.0 / 0.5 / 1.0
+    - sinon : 0 / 1 / 2
+    """
+    maxv = act.max_action_value if act else None
+    if maxv is not None and maxv <= 1.0:
+        mapping = {PRESET_AWAY: 0.0, PRESET_ECO: 0.5, PRESET_COMFORT: 1.0}
+    else:
+        mapping = {PRESET_AWAY: 0.0, PRESET_ECO: 1.0, PRESET_COMFORT: 2.0}
+    return mapping[preset]
+
+
+def value_to_preset(act: Actuator, value: float) -> str:
+    maxv = act.max_action_value
+    if maxv is not None and maxv <= 1.0:
+        # 0 / 0.5 / 1
+        if value < 0.25:
+            return PRESET_AWAY
+        if value < 0.75:
+            return PRESET_ECO
+        return PRESET_COMFORT
+    else:
+        # 0 / 1 / 2 (ou approchant)
+        if value < 0.5:
+            return PRESET_AWAY
+        if value < 1.5:
+            return PRESET_ECO
+        return PRESET_COMFORT
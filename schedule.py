@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta
+import heapq
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    SCHEDULE_BATCH_SPACING,
+    SCHEDULE_MAX_BATCH,
+    SCHEDULE_STORAGE_VERSION,
+)
+from .coordinator import HemisCoordinator
+from .presets import preset_to_value
+
+_LOGGER = logging.getLogger(__name__)
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# (building_id, it_id, actuator_id)
+HeaterKey = tuple[str, str, str]
+
+
+def schedule_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Store des plannings fil pilote d'une entrée."""
+    return Store(hass, SCHEDULE_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.schedules")
+
+
+@dataclass(frozen=True, slots=True)
+class WeeklySchedule:
+    """Planning hebdomadaire d'un chauffage, compilé en minutes de la semaine (lundi 00:00 = 0)."""
+
+    minutes: tuple[int, ...]
+    presets: tuple[str, ...]
+
+    @classmethod
+    def from_transitions(cls, transitions: list[dict[str, Any]]) -> WeeklySchedule:
+        """transitions : [{"at": "HH:MM[:SS]", "preset": ..., "days": ["mon", ...]}], days absent = tous les jours."""
+        by_minute: dict[int, str] = {}
+        for t in transitions:
+            at = dt_time.fromisoformat(t["at"]) if isinstance(t["at"], str) else t["at"]
+            for day in t.get("days") or WEEKDAYS:
+                by_minute[WEEKDAYS.index(day) * MINUTES_PER_DAY + at.hour * 60 + at.minute] = t["preset"]
+        ordered = sorted(by_minute.items())
+        return cls(tuple(m for m, _ in ordered), tuple(p for _, p in ordered))
+
+    def next_after(self, now: datetime) -> tuple[datetime, str]:
+        """Prochaine transition strictement après `now` (heure locale, à la minute)."""
+        current = now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+        idx = bisect_right(self.minutes, current)
+        offset = 0
+        if idx == len(self.minutes):
+            idx, offset = 0, MINUTES_PER_WEEK
+        minute = self.minutes[idx] + offset
+        day, in_day = divmod(minute, MINUTES_PER_DAY)
+        date = now.date() + timedelta(days=day - now.weekday())
+        # combine en heure locale : le changement d'heure est géré par le fuseau
+        when = datetime.combine(date, dt_time(in_day // 60, in_day % 60), tzinfo=now.tzinfo)
+        return when, self.presets[idx]
+
+
+class ScheduleEngine:
+    """Applique les plannings fil pilote de tous les chauffages d'une entrée.
+
+    La prochaine transition de chaque chauffage est précalculée dans un tas : un seul timer,
+    armé sur la plus proche. À son échéance, toutes les transitions dues sont regroupées par
+    bâtiment et envoyées via `async_set_group` (tranches de SCHEDULE_MAX_BATCH espacées de
+    SCHEDULE_BATCH_SPACING, concurrence bornée par le client), avec un seul refresh.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: dict[str, HemisCoordinator],
+        store: Store,
+    ) -> None:
+        self.hass = hass
+        self.coordinators = coordinators
+        self._store = store
+        self._schedules: dict[HeaterKey, WeeklySchedule] = {}
+        self._transitions: dict[HeaterKey, list[dict[str, Any]]] = {}
+        # (échéance, génération, chauffage) ; les entrées d'une génération périmée sont ignorées
+        self._heap: list[tuple[datetime, int, HeaterKey]] = []
+        self._generation: dict[HeaterKey, int] = {}
+        self._next: dict[HeaterKey, tuple[datetime, str]] = {}
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._timer_at: datetime | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load() or {}
+        for heater in stored.get("heaters", []):
+            key = (heater["building_id"], heater["it_id"], heater["actuator_id"])
+            self._set(key, heater["transitions"])
+        self._async_arm()
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+            self._timer_at = None
+        for task in self._tasks:
+            task.cancel()
+
+    @callback
+    def async_set_schedule(self, key: HeaterKey, transitions: list[dict[str, Any]]) -> None:
+        self._set(key, transitions)
+        self._async_save()
+        self._async_arm()
+
+    @callback
+    def async_clear_schedule(self, key: HeaterKey) -> None:
+        if self._transitions.pop(key, None) is None:
+            return
+        self._schedules.pop(key, None)
+        self._next.pop(key, None)
+        self._generation[key] = self._generation.get(key, 0) + 1
+        self._async_save()
+        self._async_arm()
+
+    def next_transition(self, key: HeaterKey) -> tuple[datetime, str] | None:
+        return self._next.get(key)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "heaters": len(self._schedules),
+            "next_wakeup": self._timer_at.isoformat() if self._timer_at else None,
+        }
+
+    def _set(self, key: HeaterKey, transitions: list[dict[str, Any]]) -> None:
+        # forme sérialisable (heures en texte) : persistée telle quelle
+        transitions = [
+            {**t, "at": t["at"] if isinstance(t["at"], str) else t["at"].strftime("%H:%M")}
+            for t in transitions
+        ]
+        self._transitions[key] = transitions
+        self._schedules[key] = WeeklySchedule.from_transitions(transitions)
+        self._push(key, dt_util.now())
+
+    def _push(self, key: HeaterKey, now: datetime) -> None:
+        generation = self._generation.get(key, 0) + 1
+        self._generation[key] = generation
+        when, preset = self._schedules[key].next_after(now)
+        self._next[key] = (when, preset)
+        heapq.heappush(self._heap, (when, generation, key))
+
+    @callback
+    def _async_save(self) -> None:
+        self._store.async_delay_save(
+            lambda: {
+                "heaters": [
+                    {"building_id": k[0], "it_id": k[1], "actuator_id": k[2], "transitions": t}
+                    for k, t in self._transitions.items()
+                ]
+            },
+            1,
+        )
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and heap[0][1] != self._generation.get(heap[0][2]):
+            heapq.heappop(heap)
+
+    @callback
+    def _async_arm(self) -> None:
+        """(Ré)arme l'unique timer sur la transition la plus proche."""
+        self._drop_stale()
+        when = self._heap[0][0] if self._heap else None
+        if when == self._timer_at:
+            return
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._timer_at = when
+        if when is not None:
+            self._unsub_timer = async_track_point_in_time(self.hass, self._async_fire, when)
+
+    @callback
+    def _async_fire(self, _now: datetime) -> None:
+        self._unsub_timer = None
+        self._timer_at = None
+        now = dt_util.now()
+
+        due: dict[HeaterKey, str] = {}
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, key = heapq.heappop(self._heap)
+            due[key] = self._next[key][1]
+            self._push(key, now)
+        self._async_arm()
+
+        batches: dict[HemisCoordinator, dict[tuple[str, str], float]] = {}
+        for (building_id, it_id, actuator_id), preset in due.items():
+            coordinator = self.coordinators.get(building_id)
+            act = coordinator.data.get_actuator(it_id, actuator_id) if coordinator and coordinator.data else None
+            if act is None:
+                _LOGGER.debug("Scheduled heater %s/%s not found, skipped", it_id, actuator_id)
+                continue
+            value = preset_to_value(act, preset)
+            current = coordinator.actuator_value(it_id, actuator_id)
+            if current is not None and abs(current - value) < 1e-3:
+                # déjà dans le bon preset : pas de commande
+                continue
+            batches.setdefault(coordinator, {})[act.key] = value
+
+        for coordinator, values in batches.items():
+            task = self.hass.async_create_background_task(
+                self._async_dispatch(coordinator, values), f"{DOMAIN} schedule dispatch"
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _async_dispatch(self, coordinator: HemisCoordinator, values: dict[tuple[str, str], float]) -> None:
+        keys = list(values)
+        failed = 0
+        for start in range(0, len(keys), SCHEDULE_MAX_BATCH):
+            if start:
+                await asyncio.sleep(SCHEDULE_BATCH_SPACING)
+            chunk = {key: values[key] for key in keys[start:start + SCHEDULE_MAX_BATCH]}
+            results = await coordinator.async_set_group(chunk)
+            failed += sum(error is not None for error in results.values())
+        if failed:
+            _LOGGER.warning(
+                "Schedule: %d/%d preset changes failed for building %s",
+                failed, len(keys), coordinator.client.building_id,
+            )
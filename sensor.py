@@ -1,23 +1,31 @@
 from __future__ import annotations
 
+from collections import deque
+from collections.abc import Callable
 from dataclasses import dataclass
+import math
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
-from .coordinator import HemisCoordinator
-
-
-def _safe_float(v):
-    try:
-        return float(v)
-    except Exception:
-        return None
+from .api import Sensor
+from .const import (
+    DOMAIN,
+    CONF_SENSOR_AGGREGATE,
+    CONF_SENSOR_WINDOW,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_BATTERY_DEADBAND,
+    DEFAULT_SENSOR_AGGREGATE,
+    DEFAULT_SENSOR_WINDOW,
+)
+from .coordinator import SENSOR_LANE_CONTEXT, HemisCoordinator, sensor_context
+from .entity import async_track_platform_devices
+from .metrics import HemisMetrics
 
 
 @dataclass
@@ -25,33 +33,138 @@ class HemisSensorDescriptor:
     key: str
     device_class: SensorDeviceClass | None
     unit: str | None
+    precision: int | None = None
+    # option de bande morte ; None = capteur non agrégé
+    deadband_option: str | None = None
 
 
+# clés = classify.SENSOR_STATE_IDS
 SUPPORTED = {
-    "TMP": HemisSensorDescriptor("TMP", SensorDeviceClass.TEMPERATURE, "°C"),
-    "BATTERY_LEVEL": HemisSensorDescriptor("BATTERY_LEVEL", SensorDeviceClass.BATTERY, "%"),
+    "TMP": HemisSensorDescriptor("TMP", SensorDeviceClass.TEMPERATURE, "°C", 2, CONF_TEMPERATURE_DEADBAND),
+    "BATTERY_LEVEL": HemisSensorDescriptor("BATTERY_LEVEL", SensorDeviceClass.BATTERY, "%", 0, CONF_BATTERY_DEADBAND),
     "SWS": HemisSensorDescriptor("SWS", None, None),
 }
 
 
+@dataclass(slots=True)
+class SensorAggregator:
+    """Fenêtre glissante (ring buffer) de relevés + bande morte sur la valeur publiée."""
+
+    mode: str
+    deadband: float
+    samples: deque[float]
+    published: float | None = None
+
+    @classmethod
+    def create(cls, mode: str, window: int, deadband: float) -> SensorAggregator:
+        return cls(mode, deadband, deque(maxlen=1 if mode == "last" else max(1, window)))
+
+    def push(self, value: float | None) -> bool:
+        """Ajoute un relevé ; True si la valeur publiée change."""
+        if value is None:
+            return False
+        self.samples.append(value)
+        if self.mode == "mean":
+            aggregated = math.fsum(self.samples) / len(self.samples)
+        elif self.mode == "min":
+            aggregated = min(self.samples)
+        elif self.mode == "max":
+            aggregated = max(self.samples)
+        else:
+            aggregated = value
+
+        # hystérésis : il faut s'écarter d'au moins `deadband` de la dernière valeur publiée
+        if self.published is not None and abs(aggregated - self.published) < self.deadband:
+            return False
+        self.published = aggregated
+        return True
+
+
+@dataclass
+class HemisMetricDescriptor:
+    key: str
+    name: str
+    unit: str | None
+    state_class: SensorStateClass
+    value: Callable[[HemisMetrics], Any]
+
+
+def _timing(name: str, field_name: str) -> Callable[[HemisMetrics], Any]:
+    def _value(m: HemisMetrics) -> Any:
+        hist = m.timings.get(name)
+        return hist.as_dict()[field_name] if hist is not None and hist.count else None
+    return _value
+
+
+def _latency_p95(endpoint: str) -> Callable[[HemisMetrics], Any]:
+    def _value(m: HemisMetrics) -> Any:
+        hist = m.latency.get(endpoint)
+        return hist.percentile(0.95) if hist is not None else None
+    return _value
+
+
+# capteurs de diagnostic (option "métriques") ; le détail complet est dans le téléchargement des diagnostics
+METRIC_SENSORS = (
+    HemisMetricDescriptor(
+        "refresh_duration", "Refresh duration", "ms", SensorStateClass.MEASUREMENT, _timing("refresh", "last_ms")
+    ),
+    HemisMetricDescriptor(
+        "refresh_duration_p95", "Refresh duration p95", "ms", SensorStateClass.MEASUREMENT, _timing("refresh", "p95_ms")
+    ),
+    HemisMetricDescriptor(
+        "actuators_latency_p95", "Actuators latency p95", "ms", SensorStateClass.MEASUREMENT, _latency_p95("actuators")
+    ),
+    HemisMetricDescriptor(
+        "entities_updated", "Entities updated per tick", None, SensorStateClass.MEASUREMENT,
+        lambda m: m.entities_updated_last,
+    ),
+    HemisMetricDescriptor(
+        "reauth_count", "Re-authentications", None, SensorStateClass.TOTAL_INCREASING,
+        lambda m: m.counters.get("reauth", 0),
+    ),
+    HemisMetricDescriptor(
+        "unauthorized_count", "401 responses", None, SensorStateClass.TOTAL_INCREASING,
+        lambda m: m.counters.get("unauthorized", 0),
+    ),
+)
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
-    coordinator: HemisCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    coordinators: dict[str, HemisCoordinator] = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+
+    mode = entry.options.get(CONF_SENSOR_AGGREGATE, DEFAULT_SENSOR_AGGREGATE)
+    window = entry.options.get(CONF_SENSOR_WINDOW, DEFAULT_SENSOR_WINDOW)
 
-    entities: list[HemisSensor] = []
-    for s in coordinator.data.sensors:
-        state = s.get("state") or {}
-        sid = state.get("id")
-        if sid not in SUPPORTED:
-            continue
+    def _create(coordinator: HemisCoordinator, s: Sensor) -> HemisSensor:
+        desc = SUPPORTED[s.state_id]
+        deadband = entry.options.get(desc.deadband_option, 0.0) if desc.deadband_option else 0.0
+        aggregator = None
+        if desc.deadband_option and (mode != "last" or deadband > 0):
+            aggregator = SensorAggregator.create(mode, window, deadband)
+        return HemisSensor(coordinator, s.id, s.state_id, aggregator)
 
-        entities.append(HemisSensor(coordinator, s["id"], sid))
+    async_track_platform_devices(hass, entry, coordinators, "sensor", async_add_entities, _create)
 
-    async_add_entities(entities)
+    data = hass.data[DOMAIN][entry.entry_id]
+    if data["client"].metrics is not None:
+        # un jeu par bâtiment, mis à jour à chaque tick de son coordinator
+        async_add_entities(
+            HemisMetricSensor(coordinator, entry.entry_id, desc, primary=coordinator is data["coordinator"])
+            for coordinator in coordinators.values()
+            for desc in METRIC_SENSORS
+        )
 
 
 class HemisSensor(CoordinatorEntity[HemisCoordinator], SensorEntity):
-    def __init__(self, coordinator: HemisCoordinator, sensor_id: str, state_id: str) -> None:
-        super().__init__(coordinator)
+    def __init__(
+        self,
+        coordinator: HemisCoordinator,
+        sensor_id: str,
+        state_id: str,
+        aggregator: SensorAggregator | None = None,
+    ) -> None:
+        # agrégé : un relevé par poll de la voie capteurs, même si la valeur n'a pas bougé
+        super().__init__(coordinator, context=sensor_context(sensor_id) if aggregator is None else SENSOR_LANE_CONTEXT)
         self._sensor_id = sensor_id
         self._state_id = state_id
         self._attr_unique_id = f"hemis_sensor_{sensor_id}_{state_id}"
@@ -60,19 +173,51 @@ class HemisSensor(CoordinatorEntity[HemisCoordinator], SensorEntity):
         desc = SUPPORTED[state_id]
         self._attr_device_class = desc.device_class
         self._attr_native_unit_of_measurement = desc.unit
+        self._precision = desc.precision
+
+        self._aggregator = aggregator
+        self._polled_at = coordinator.sensors_polled_at
+        self._was_available = True
+        if aggregator is not None:
+            aggregator.push(self._reading())
+
+    @property
+    def available(self) -> bool:
+        # endpoint capteurs en erreur trop longtemps : valeurs plus servies comme actuelles
+        return super().available and self.coordinator.sensors_available
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._aggregator is None:
+            super()._handle_coordinator_update()
+            return
+
+        # n'écrit l'état que si la valeur publiée ou la disponibilité change
+        available = self.available
+        changed = available != self._was_available
+        self._was_available = available
+        if self.coordinator.sensors_polled_at != self._polled_at:
+            self._polled_at = self.coordinator.sensors_polled_at
+            changed = self._aggregator.push(self._reading()) or changed
+        if changed:
+            self.async_write_ha_state()
 
     @property
     def native_value(self):
+        if self._aggregator is None:
+            return self._reading()
+        value = self._aggregator.published
+        return None if value is None else round(value, self._precision)
+
+    def _reading(self):
         # Recherche du capteur courant dans le snapshot
-        current = next((x for x in self.coordinator.data.sensors if x.get("id") == self._sensor_id), None)
+        current = self.coordinator.data.get_sensor(self._sensor_id)
         if not current:
             return None
-        st = current.get("state") or {}
-        v = st.get("value")
+        fv = current.value
 
         if self._state_id == "BATTERY_LEVEL":
             # souvent 0..1 -> convertir en %
-            fv = _safe_float(v)
             if fv is None:
                 return None
             if 0.0 <= fv <= 1.0:
@@ -80,9 +225,33 @@ class HemisSensor(CoordinatorEntity[HemisCoordinator], SensorEntity):
             return fv
 
         if self._state_id == "TMP":
-            fv = _safe_float(v)
             return None if fv is None else round(fv, 2)
 
         # SWS brut
-        fv = _safe_float(v)
-        return int(fv) if fv is not None else v
+        return int(fv) if fv is not None else current.raw_value
+
+
+class HemisMetricSensor(CoordinatorEntity[HemisCoordinator], SensorEntity):
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self, coordinator: HemisCoordinator, entry_id: str, desc: HemisMetricDescriptor, *, primary: bool = True
+    ) -> None:
+        # pas de contexte : notifié à chaque tick
+        super().__init__(coordinator)
+        self._desc = desc
+        if primary:
+            # identifiants d'origine conservés pour le bâtiment principal
+            self._attr_unique_id = f"hemis_metric_{entry_id}_{desc.key}"
+            self._attr_name = f"Hemis {desc.name}"
+        else:
+            building_id = coordinator.client.building_id
+            self._attr_unique_id = f"hemis_metric_{entry_id}_{building_id}_{desc.key}"
+            self._attr_name = f"Hemis {desc.name} {building_id[-6:]}"
+        self._attr_native_unit_of_measurement = desc.unit
+        self._attr_state_class = desc.state_class
+
+    @property
+    def native_value(self):
+        metrics = self.coordinator.client.metrics
+        return self._desc.value(metrics) if metrics is not None else None
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .const import DOMAIN
+from .coordinator import HemisCoordinator
+from .entity import actuator_unique_id
+from .presets import PRESETS
+from .schedule import WEEKDAYS, HeaterKey, ScheduleEngine
+
+SERVICE_SET_GROUP = "set_group"
+SERVICE_SET_SCHEDULE = "set_schedule"
+SERVICE_CLEAR_SCHEDULE = "clear_schedule"
+
+ATTR_ACTUATORS = "actuators"
+ATTR_IT_ID = "it_id"
+ATTR_ACTUATOR_ID = "actuator_id"
+ATTR_BUILDING_ID = "building_id"
+ATTR_VALUE = "value"
+ATTR_DURATION_MS = "duration_ms"
+ATTR_SCHEDULE = "schedule"
+ATTR_AT = "at"
+ATTR_PRESET = "preset"
+ATTR_DAYS = "days"
+
+SET_GROUP_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+            vol.Optional(ATTR_ACTUATORS): [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_IT_ID): cv.string,
+                        vol.Required(ATTR_ACTUATOR_ID): cv.string,
+                        vol.Optional(ATTR_BUILDING_ID): cv.string,
+                    }
+                )
+            ],
+            vol.Required(ATTR_VALUE): vol.Coerce(float),
+            vol.Optional(ATTR_DURATION_MS, default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ENTITY_ID, ATTR_ACTUATORS),
+)
+
+SET_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Required(ATTR_SCHEDULE): vol.All(
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_AT): cv.time,
+                        vol.Required(ATTR_PRESET): vol.In(PRESETS),
+                        vol.Optional(ATTR_DAYS): vol.All(cv.ensure_list, [vol.In(WEEKDAYS)]),
+                    }
+                )
+            ],
+            vol.Length(min=1),
+        ),
+    }
+)
+
+CLEAR_SCHEDULE_SCHEMA = vol.Schema({vol.Required(ATTR_ENTITY_ID): cv.entity_ids})
+
+_Key = tuple[str, str]
+
+
+def _entries(hass: HomeAssistant) -> dict[str, dict[str, Any]]:
+    # hass.data[DOMAIN] contient aussi la config YAML
+    return {
+        entry_id: data
+        for entry_id, data in hass.data.get(DOMAIN, {}).items()
+        if isinstance(data, dict) and "coordinators" in data
+    }
+
+
+def _resolve_entities(
+    hass: HomeAssistant, entity_ids: list[str]
+) -> tuple[list[tuple[str, HemisCoordinator, _Key]], list[str]]:
+    """Entités Hemis -> (entry_id, coordinator, actionneur) ; retourne aussi les entités inconnues."""
+    entries = _entries(hass)
+    registry = er.async_get(hass)
+    by_unique_id: dict[str, dict[str, tuple[HemisCoordinator, _Key]]] = {}
+    found: list[tuple[str, HemisCoordinator, _Key]] = []
+    unknown: list[str] = []
+    for entity_id in entity_ids:
+        reg = registry.async_get(entity_id)
+        data = entries.get(reg.config_entry_id) if reg is not None and reg.platform == DOMAIN else None
+        if data is None:
+            unknown.append(entity_id)
+            continue
+        index = by_unique_id.get(reg.config_entry_id)
+        if index is None:
+            index = by_unique_id[reg.config_entry_id] = {
+                actuator_unique_id(*key): (coordinator, key)
+                for coordinator in data["coordinators"].values() if coordinator.data
+                for key in coordinator.data.actuators_by_key
+            }
+        target = index.get(reg.unique_id)
+        if target is None:
+            unknown.append(entity_id)
+            continue
+        found.append((reg.config_entry_id, *target))
+    return found, unknown
+
+
+def _resolve_targets(hass: HomeAssistant, call: ServiceCall) -> tuple[dict[HemisCoordinator, list[_Key]], list[str]]:
+    """Regroupe les actionneurs visés par bâtiment ; retourne aussi les cibles inconnues."""
+    entries = _entries(hass)
+    targets: dict[HemisCoordinator, list[_Key]] = {}
+
+    def _add(coordinator: HemisCoordinator, key: _Key) -> None:
+        keys = targets.setdefault(coordinator, [])
+        if key not in keys:
+            keys.append(key)
+
+    found, unknown = _resolve_entities(hass, call.data.get(ATTR_ENTITY_ID, []))
+    for _entry_id, coordinator, key in found:
+        _add(coordinator, key)
+
+    for target in call.data.get(ATTR_ACTUATORS, []):
+        key = (target[ATTR_IT_ID], target[ATTR_ACTUATOR_ID])
+        building_id = target.get(ATTR_BUILDING_ID)
+        coordinator = next(
+            (
+                c
+                for data in entries.values()
+                for bid, c in data["coordinators"].items()
+                if (building_id is None or bid == building_id) and c.data and c.data.get_actuator(*key)
+            ),
+            None,
+        )
+        if coordinator is None:
+            unknown.append(f"{key[0]}/{key[1]}")
+            continue
+        _add(coordinator, key)
+
+    return targets, unknown
+
+
+def _resolve_heaters(hass: HomeAssistant, call: ServiceCall) -> list[tuple[ScheduleEngine, HeaterKey]]:
+    entries = _entries(hass)
+    found, unknown = _resolve_entities(hass, call.data[ATTR_ENTITY_ID])
+    heaters = []
+    for entry_id, coordinator, key in found:
+        if key not in {act.key for act in coordinator.devices("climate")}:
+            unknown.append(actuator_unique_id(*key))
+            continue
+        heaters.append((entries[entry_id]["schedules"], (coordinator.client.building_id, *key)))
+    if unknown:
+        raise ServiceValidationError(f"Not Hemis pilot wire heaters: {', '.join(unknown)}")
+    return heaters
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    if hass.services.has_service(DOMAIN, SERVICE_SET_GROUP):
+        return
+
+    async def _async_set_group(call: ServiceCall) -> ServiceResponse:
+        targets, unknown = _resolve_targets(hass, call)
+        if not targets:
+            raise ServiceValidationError(f"No Hemis actuator found for {', '.join(unknown)}")
+
+        value = call.data[ATTR_VALUE]
+        duration_ms = call.data[ATTR_DURATION_MS]
+        # bâtiments en parallèle ; dans chacun, envois bornés par command_concurrency et un seul refresh
+        coordinators = list(targets)
+        per_building = await asyncio.gather(
+            *(c.async_set_group({key: value for key in targets[c]}, duration_ms) for c in coordinators)
+        )
+
+        results = [
+            {
+                ATTR_BUILDING_ID: coordinator.client.building_id,
+                ATTR_IT_ID: key[0],
+                ATTR_ACTUATOR_ID: key[1],
+                "success": error is None,
+                "error": str(error) if error is not None else None,
+            }
+            for coordinator, outcome in zip(coordinators, per_building)
+            for key, error in outcome.items()
+        ]
+        return {
+            "succeeded": sum(r["success"] for r in results),
+            "failed": sum(not r["success"] for r in results),
+            "unknown": unknown,
+            "results": results,
+        }
+
+    async def _async_set_schedule(call: ServiceCall) -> None:
+        for engine, key in _resolve_heaters(hass, call):
+            engine.async_set_schedule(key, call.data[ATTR_SCHEDULE])
+
+    async def _async_clear_schedule(call: ServiceCall) -> None:
+        for engine, key in _resolve_heaters(hass, call):
+            engine.async_clear_schedule(key)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_GROUP,
+        _async_set_group,
+        schema=SET_GROUP_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(DOMAIN, SERVICE_SET_SCHEDULE, _async_set_schedule, schema=SET_SCHEDULE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_CLEAR_SCHEDULE, _async_clear_schedule, schema=CLEAR_SCHEDULE_SCHEMA)
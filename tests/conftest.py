@@ -0,0 +1,99 @@
+"""Harnais de test : intégration chargée comme package + serveur Hemis local (benchmarks/mock_server.py)."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+import importlib
+import importlib.util
+from pathlib import Path
+import sys
+import time
+from types import ModuleType
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("homeassistant")
+
+from mock_server import HEMIS_PREFIX, MockHemis  # noqa: E402
+
+ACTUATORS_GET = f"GET {HEMIS_PREFIX}/intelligent-things/actuators"
+SENSORS_GET = f"GET {HEMIS_PREFIX}/intelligent-things/sensors"
+STATE_PUT = f"PUT {HEMIS_PREFIX}/intelligent-things/{{it_id}}/actuator/{{actuator_id}}/state"
+SIGNIN_POST = "POST /users/signin"
+
+
+def load(module: str) -> ModuleType:
+    """Module de l'intégration (package `ubiant_hemis`, pour les imports relatifs)."""
+    if "ubiant_hemis" not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            "ubiant_hemis", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+        )
+        pkg = importlib.util.module_from_spec(spec)
+        sys.modules["ubiant_hemis"] = pkg
+        spec.loader.exec_module(pkg)
+    return importlib.import_module(f"ubiant_hemis.{module}")
+
+
+@pytest.fixture
+def run() -> Callable:
+    """Exécute une coroutine dans une boucle neuve (pas besoin de pytest-asyncio)."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@asynccontextmanager
+async def hemis_env(**mock_kwargs) -> AsyncIterator[tuple[MockHemis, object]]:
+    """Mock démarré + client authentifié et rattaché au bâtiment ; compteurs du mock remis à zéro."""
+    api = load("api")
+    metrics = load("metrics")
+    mock = MockHemis(**mock_kwargs)
+    runner = await mock.start()
+    session = aiohttp.ClientSession()
+    client = api.HemisClient(
+        base_url="",
+        building_id="",
+        token="",
+        email="test@example.com",
+        password="test",
+        auth_base_url=mock.base_url,
+        session=session,
+        retry_backoff=0.01,
+        metrics=metrics.HemisMetrics(),
+    )
+    try:
+        await client._authenticate()
+        client.building_id, client.base_url = await client.discover_building_and_base_url()
+        mock.requests.clear()
+        yield mock, client
+    finally:
+        await client.async_close()
+        await session.close()
+        await runner.cleanup()
+
+
+@asynccontextmanager
+async def hemis_coordinator(**mock_kwargs) -> AsyncIterator[tuple[MockHemis, object]]:
+    """Comme hemis_env, avec un vrai HemisCoordinator (instance HA minimale, sans Store)."""
+    from homeassistant.core import HomeAssistant
+
+    coordinator = load("coordinator")
+    hass = HomeAssistant(str(ROOT / "tests"))
+    try:
+        async with hemis_env(**mock_kwargs) as (mock, client):
+            yield mock, coordinator.HemisCoordinator(hass, client)
+    finally:
+        await hass.async_stop(force=True)
+
+
+async def wait_for(predicate: Callable[[], bool], timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
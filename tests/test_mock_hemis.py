@@ -0,0 +1,149 @@
+"""Comportement du client et du coordinator contre le serveur Hemis local.
+
+Garde-fous de performance : nombre de requêtes par refresh / par lot de commandes,
+court-circuit des listes inchangées, entités notifiées, et un plafond de temps grossier.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from conftest import (
+    ACTUATORS_GET,
+    SENSORS_GET,
+    SIGNIN_POST,
+    STATE_PUT,
+    hemis_coordinator,
+    hemis_env,
+    load,
+    wait_for,
+)
+
+
+def test_refresh_requests_per_lane(run) -> None:
+    async def scenario() -> None:
+        async with hemis_coordinator(actuators=60, sensors=20) as (mock, coordinator):
+            await coordinator.async_refresh()
+            assert coordinator.last_update_success
+            assert mock.requests == {ACTUATORS_GET: 1, SENSORS_GET: 1}
+
+            # voie capteurs pas encore due : seuls les actionneurs sont relevés
+            await coordinator.async_refresh()
+            assert mock.requests == {ACTUATORS_GET: 2, SENSORS_GET: 1}
+
+    run(scenario())
+
+
+def test_unchanged_lists_short_circuit(run) -> None:
+    async def scenario() -> None:
+        async with hemis_coordinator(actuators=60, sensors=20, etag=True) as (mock, coordinator):
+            await coordinator.async_refresh()
+            first = coordinator.data
+
+            notified = []
+            for act in first.actuators:
+                coordinator.async_add_listener(lambda: notified.append(1), load("coordinator").actuator_context(*act.key))
+
+            await coordinator.async_refresh()
+            # 304 : même liste, index réutilisé, aucune entité réveillée
+            assert coordinator.client.metrics.counters.get("not_modified") == 1
+            assert coordinator.data.actuators is first.actuators
+            assert coordinator.data.actuators_by_key is first.actuators_by_key
+            assert notified == []
+
+    run(scenario())
+
+
+def test_only_changed_entities_are_notified(run) -> None:
+    async def scenario() -> None:
+        async with hemis_coordinator(actuators=500, sensors=20, churn=0.02) as (mock, coordinator):
+            await coordinator.async_refresh()
+            context = load("coordinator").actuator_context
+            notified = []
+            for act in coordinator.data.actuators:
+                coordinator.async_add_listener(lambda: notified.append(1), context(*act.key))
+
+            await coordinator.async_refresh()
+            # 2 % de churn par GET (le GET capteurs du premier refresh compte aussi) : ~20 entités, pas 500
+            assert 0 < len(notified) <= 2 * 500 * 0.02
+            assert coordinator.client.metrics.entities_updated_last == len(notified)
+
+    run(scenario())
+
+
+def test_single_login_under_concurrent_401(run) -> None:
+    async def scenario() -> None:
+        async with hemis_env(actuators=20, sensors=5) as (mock, client):
+            mock._tokens.clear()  # token révoqué côté serveur : tous les appels reçoivent un 401
+            keys = list(mock._actuators)[:6]
+            await asyncio.gather(
+                client.get_sensors(),
+                client.get_actuators(),
+                *(client.set_actuator_value(*key, 1.0, duration_ms=0) for key in keys),
+            )
+            assert mock.requests[SIGNIN_POST] == 1
+            assert mock.requests[STATE_PUT] == 2 * len(keys)
+
+    run(scenario())
+
+
+def test_one_refresh_per_command_batch(run) -> None:
+    async def scenario() -> None:
+        async with hemis_coordinator(actuators=60, sensors=20) as (mock, coordinator):
+            await coordinator.async_refresh()
+            keys = list(mock._actuators)[:20]
+
+            await asyncio.gather(
+                *(coordinator.async_set_actuator_value(*key, 1.0, duration_ms=0) for key in keys)
+            )
+            await wait_for(lambda: mock.requests[ACTUATORS_GET] == 2)
+            await asyncio.sleep(0.2)
+            assert mock.requests[STATE_PUT] == len(keys)
+            assert mock.requests[ACTUATORS_GET] == 2
+
+    run(scenario())
+
+
+def test_group_command_respects_concurrency(run) -> None:
+    async def scenario() -> None:
+        async with hemis_coordinator(actuators=60, sensors=20, latency=0.02) as (mock, coordinator):
+            await coordinator.async_refresh()
+            client = coordinator.client
+            keys = list(mock._actuators)[:12]
+
+            inflight = peak = 0
+            send = client.set_actuator_value
+
+            async def counting(*args, **kwargs) -> None:
+                nonlocal inflight, peak
+                inflight += 1
+                peak = max(peak, inflight)
+                try:
+                    await send(*args, **kwargs)
+                finally:
+                    inflight -= 1
+
+            client.set_actuator_value = counting
+            results = await asyncio.gather(
+                coordinator.async_set_group({key: 1.0 for key in keys[:6]}),
+                coordinator.async_set_group({key: 0.0 for key in keys[6:]}),
+            )
+            assert all(error is None for r in results for error in r.values())
+            assert peak <= client.command_concurrency
+            assert mock.requests[STATE_PUT] == len(keys)
+
+    run(scenario())
+
+
+def test_refresh_time_budget(run) -> None:
+    async def scenario() -> None:
+        async with hemis_coordinator(actuators=2000, sensors=600, churn=0.01) as (mock, coordinator):
+            start = time.perf_counter()
+            for _ in range(5):
+                await coordinator.async_refresh()
+            elapsed = (time.perf_counter() - start) / 5
+            assert coordinator.last_update_success
+            # plafond grossier (machine de CI lente comprise) : détecte une régression d'un ordre de grandeur
+            assert elapsed < 1.0, f"refresh took {elapsed * 1000:.0f} ms"
+
+    run(scenario())